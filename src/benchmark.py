@@ -0,0 +1,231 @@
+"""Benchmarks of the opportunity search hot path over synthetic pool graphs.
+
+Every pool is an in-memory `FakePool`, so no network is needed. Results are
+written as JSON, and `--compare` prints the speedup against earlier results:
+
+    python3 src/benchmark.py --assets 12 --dexes 2 --cutoff 4 --output new.json --compare old.json
+"""
+from typing import Callable, Dict, Iterable, List
+from itertools import combinations, cycle
+import argparse
+import json
+import platform
+import random
+import subprocess
+import time
+
+import numpy as np
+from algosdk import account, mnemonic, transaction
+
+from bot.account import Account
+from bot.arbitrage import ArbitrageGraph, ArbitragePath, find_cycles
+from bot.asset import Asset, ALGO
+from bot.pool import Pool
+from bot.quote import tinyman_amount_out, tinyman_amount_out_array
+from bot.bellman_ford import BellmanFord
+from bot.screening import ReserveBook, Screener
+from bot.templates import GroupBuilder
+
+DEFAULT_ASSETS = 10
+DEFAULT_DEXES = 2
+DEFAULT_CUTOFF = 4
+DEFAULT_DENSITY = 0.6
+DEFAULT_PATHS = 200
+DEFAULT_REPEAT = 5
+DEFAULT_MAX_AMOUNT_IN = 1_000_000_000
+
+
+class FakePool(Pool):
+    """Constant product pool kept in memory, quoting like Tinyman."""
+
+    swap_min_out_arg = 2
+
+    def __init__(self, assets: tuple[Asset, Asset], reserves: Iterable[int], fee_bps: int = 30, app_id: int = 0):
+        super().__init__(None, None, assets)
+        self._address = account.generate_account()[1]
+        self._app_id = app_id
+        self.restore_state(reserves, fee_bps)
+
+    def amount_out(self, asset_in: Asset, amount_in: int) -> int:
+        return tinyman_amount_out(self._supply[asset_in], self._supply[self.get_other_asset(asset_in)], amount_in, self.fee_bps)
+
+    def amount_out_array(self, asset_in: Asset, amounts_in: np.ndarray) -> np.ndarray:
+        return tinyman_amount_out_array(self._supply[asset_in], self._supply[self.get_other_asset(asset_in)], amounts_in, self.fee_bps)
+
+    def prepare_internal_swap_txns(self, sender: str, asset_in: Asset, amount_in: int, amount_out: int, suggested_params):
+        asset_out = self.get_other_asset(asset_in)
+        if asset_in == ALGO:
+            transfer = transaction.PaymentTxn(sender, suggested_params, self.address, amount_in)
+        else:
+            transfer = transaction.AssetTransferTxn(sender, suggested_params, self.address, amount_in, asset_in.index)
+        params = transaction.SuggestedParams(**{**vars(suggested_params), 'fee': 2 * suggested_params.min_fee, 'flat_fee': True})
+        call = transaction.ApplicationNoOpTxn(
+            sender, params, self._app_id, [b'swap', b'fixed-input', amount_out],
+            foreign_assets=[asset.index for asset in (asset_in, asset_out) if asset != ALGO],
+            accounts=[self.address]
+        )
+        return [transfer, call]
+
+    def refresh_state(self):
+        pass
+
+
+def make_pools(n_assets: int, n_dexes: int, density: float, seed: int) -> List[FakePool]:
+    """Pools of `n_dexes` DEXes over a random fraction `density` of the pairs of `n_assets` assets."""
+    rng = random.Random(seed)
+    assets = [ALGO] + [Asset(index, 6, f'Asset {index}', f'A{index}') for index in range(1, n_assets)]
+    pools = []
+    for pair in combinations(assets, 2):
+        if ALGO not in pair and rng.random() > density:
+            continue
+        price = rng.lognormvariate(0, 1)
+        for _ in range(n_dexes):
+            reserve = rng.randint(10 ** 9, 10 ** 12)
+            skew = rng.uniform(0.98, 1.02)
+            pools.append(FakePool(pair, (reserve, int(reserve * price * skew)), rng.choice((25, 30)), len(pools) + 1))
+    return pools
+
+
+def measure(func: Callable[[], object], repeat: int, number: int = 1, setup: Callable[[], object] = None) -> Dict[str, float]:
+    """Latencies of `number` calls of `func`, `repeat` times, as throughput and percentiles in seconds.
+
+    `setup`, if given, runs untimed before every call.
+    """
+    latencies = []
+    for _ in range(repeat):
+        for _ in range(number):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            func()
+            latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies)
+    return {
+        'calls': len(latencies),
+        'ops_per_sec': float(len(latencies) / latencies.sum()),
+        'mean': float(latencies.mean()),
+        'p50': float(np.percentile(latencies, 50)),
+        'p90': float(np.percentile(latencies, 90)),
+        'p99': float(np.percentile(latencies, 99)),
+        'max': float(latencies.max()),
+    }
+
+
+def each(paths: List[ArbitragePath], func: Callable[[ArbitragePath], object]) -> Callable[[], object]:
+    """Calls `func` on the next path, round robin, on every call of the returned function."""
+    paths = cycle(paths)
+    return lambda: func(next(paths))
+
+
+def clear_quote_caches(pools: List[FakePool]) -> Callable[[], None]:
+    def clear():
+        for pool in pools:
+            pool.quote_cache.clear()
+    return clear
+
+
+def run(n_assets: int, n_dexes: int, cutoff: int, density: float, n_paths: int, repeat: int, seed: int) -> dict:
+    pools = make_pools(n_assets, n_dexes, density, seed)
+    graph = ArbitrageGraph(pools)
+    index = graph.compile(ALGO, cutoff)
+    rng = random.Random(seed)
+    paths = rng.sample(index.paths, min(n_paths, len(index)))
+    book = ReserveBook(index.pools)
+    book.update()
+    screener = Screener(index)
+    cycle_ids = np.arange(len(index))
+
+    sender = Account(None, mnemonic.from_private_key(account.generate_account()[0]))
+    suggested_params = transaction.SuggestedParams(1000, 1, 1001, 'wGHE2Pwdvd7S12BL5FaOP20EGYesN73ktiC1qzkkit8=', 'mainnet-v1.0', min_fee=1000)
+    builder = GroupBuilder(sender)
+    builder.update(suggested_params)
+    builder.prepare(pools)
+    amount_in = DEFAULT_MAX_AMOUNT_IN // 100
+    amounts_in = np.linspace(10_000, DEFAULT_MAX_AMOUNT_IN, 64).astype(np.int64)
+
+    stages = {
+        'find_cycles': (lambda: sum(1 for _ in find_cycles(graph.graph, ALGO, cutoff)), 1),
+        'compile': (lambda: ArbitrageGraph(pools).compile(ALGO, cutoff), 1),
+        'screen': (lambda: screener.estimate_profit(book, cycle_ids, DEFAULT_MAX_AMOUNT_IN), 10),
+        'bellman_ford': (lambda: BellmanFord(pools).update(book, np.arange(len(pools))), 10),
+        'amount_out': (each(paths, lambda path: path.amount_out(amount_in)), len(paths)),
+        'amount_out_cached': (each(paths, lambda path: path.amount_out(amount_in)), len(paths)),
+        'amount_out_array': (each(paths, lambda path: path.amount_out_array(amounts_in)), len(paths)),
+        'optimal_amount_in_analytic': (each(paths, lambda path: path.optimal_amount_in_analytic(DEFAULT_MAX_AMOUNT_IN)), len(paths)),
+        'optimal_amount_in_fast': (each(paths, lambda path: path.optimal_amount_in_fast(DEFAULT_MAX_AMOUNT_IN)), len(paths)),
+        'optimal_amount_in_precise': (each(paths, lambda path: path.optimal_amount_in_precise(DEFAULT_MAX_AMOUNT_IN)), min(len(paths), 20)),
+        'prepare_txn': (each(paths, lambda path: path.prepare_txn(sender, amount_in, suggested_params)), len(paths)),
+        'build_group': (each(paths, lambda path: builder.build(path, amount_in)), len(paths)),
+        'sign_group': (each(paths, lambda path: builder.sign(path, amount_in)), len(paths)),
+    }
+    # Stages quoting the same amounts on every call would otherwise time `QuoteCache` hits
+    # after the first one: their caches are cleared before each call, as for a new round.
+    uncached = {'amount_out', 'optimal_amount_in_fast', 'optimal_amount_in_precise', 'prepare_txn', 'build_group', 'sign_group'}
+    clear = clear_quote_caches(pools)
+    return {
+        'config': {
+            'assets': n_assets,
+            'dexes': n_dexes,
+            'cutoff': cutoff,
+            'density': density,
+            'seed': seed,
+            'pools': len(pools),
+            'cycles': len(index),
+        },
+        'environment': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+        },
+        'stages': {
+            name: measure(func, repeat, number, clear if name in uncached else None)
+            for name, (func, number) in stages.items()
+        },
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict) -> None:
+    print(f"{'stage':<28}{'baseline p50':>14}{'p50':>14}{'speedup':>10}")
+    for name, stats in results['stages'].items():
+        if name not in baseline['stages']:
+            continue
+        old = baseline['stages'][name]['p50']
+        # Stages faster than the timer's resolution have no speedup.
+        speedup = f"{old / stats['p50']:>9.2f}x" if old and stats['p50'] else f"{'n/a':>10}"
+        print(f"{name:<28}{old * 1e6:>12.1f}us{stats['p50'] * 1e6:>12.1f}us{speedup}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks the opportunity search hot path.')
+    parser.add_argument('--assets', type=int, default=DEFAULT_ASSETS)
+    parser.add_argument('--dexes', type=int, default=DEFAULT_DEXES)
+    parser.add_argument('--cutoff', type=int, default=DEFAULT_CUTOFF)
+    parser.add_argument('--density', type=float, default=DEFAULT_DENSITY)
+    parser.add_argument('--paths', type=int, default=DEFAULT_PATHS, help='number of cycles sampled for the per-path stages')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', metavar='FILE', help='write the results to FILE instead of stdout')
+    parser.add_argument('--compare', metavar='FILE', help='print the speedup against the results in FILE')
+    args = parser.parse_args()
+
+    results = run(args.assets, args.dexes, args.cutoff, args.density, args.paths, args.repeat, args.seed)
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump(results, fp, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+    if args.compare:
+        with open(args.compare) as fp:
+            compare(results, json.load(fp))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,17 @@
 from typing import Union
+from functools import cached_property
+import asyncio
+import base64
 
+from nacl.signing import SigningKey
+from algosdk import constants
 from algosdk.v2client.algod import AlgodClient
 from algosdk.transaction import AssetOptInTxn
 from algosdk.mnemonic import to_private_key
 from algosdk.account import address_from_private_key
 from algosdk.atomic_transaction_composer import AccountTransactionSigner
 
-from .asset import Asset, ALGO
+from .asset import Asset, ALGO, REGISTRY
 from .exceptions import NotOptedIntoAssetError
 
 
@@ -26,7 +31,7 @@ class Account:
         elif not isinstance(asset, Asset):
             raise TypeError
 
-        if refresh or not hasattr(self, 'balance'):
+        if refresh or not hasattr(self, '_balance'):
             self.refresh_state()
 
         try:
@@ -64,16 +69,42 @@ class Account:
         if not self.is_opted_in_asset(asset):
             self.algod_client.send_transaction(self._opt_in_asset_txn(asset))
 
-    @property
+    @cached_property
     def signer(self) -> AccountTransactionSigner:
         return AccountTransactionSigner(self.private_key)
 
+    @cached_property
+    def signing_key(self) -> SigningKey:
+        """The Ed25519 key, derived once instead of on every `Transaction.sign`."""
+        return SigningKey(base64.b64decode(self.private_key)[:constants.key_len_bytes])
+
     def refresh_state(self) -> None:
         self._balance = {}
 
         info = self.algod_client.account_info(self.address)
+        REGISTRY.observe_round(info['round'])
         for asset_info in info['assets']:
             asset = Asset.from_index(self.algod_client, asset_info['asset-id'])
             amount = asset_info['amount']
             self._balance[asset] = amount
         self._balance[ALGO] = info['amount']
+        self._min_balance = info.get('min-balance', 0)
+
+    async def refresh_state_async(self, client) -> None:
+        """Same as `refresh_state` through an `AsyncAlgodClient`, fetching the assets concurrently."""
+        info = await client.account_info(self.address)
+        REGISTRY.observe_round(info['round'])
+        assets = await asyncio.gather(*(
+            Asset.from_index_async(client, asset_info['asset-id']) for asset_info in info['assets']
+        ))
+
+        self._balance = {asset: asset_info['amount'] for asset, asset_info in zip(assets, info['assets'])}
+        self._balance[ALGO] = info['amount']
+        self._min_balance = info.get('min-balance', 0)
+
+    def get_spendable_balance(self, asset: Union[int, Asset]) -> int:
+        """Balance of `asset` that can be swapped, which for ALGO excludes the minimum balance."""
+        balance = self.get_balance(asset)
+        if asset == ALGO or asset == ALGO.index:
+            balance -= self._min_balance
+        return max(balance, 0)
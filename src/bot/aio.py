@@ -0,0 +1,171 @@
+from typing import Any, Awaitable, List, Optional
+import asyncio
+import json
+import logging
+import threading
+
+import aiohttp
+import msgpack
+from algosdk import transaction
+from algosdk.constants import algod_auth_header
+from algosdk.error import AlgodHTTPError
+from algosdk.v2client.algod import AlgodClient
+
+from .state import StateQuery
+from .metrics import METRICS
+
+DEFAULT_MAX_CONCURRENCY = 64
+DEFAULT_TIMEOUT = 5
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.1
+
+
+class AsyncAlgodClient:
+    """asyncio client for the algod endpoints used by the bot.
+
+    Requests share one keep-alive connection pool, at most `max_concurrency` of
+    them are in flight at once, and each one times out after `timeout` seconds
+    and is retried up to `retries` times on connection errors, timeouts and
+    5xx responses. Errors are raised as `AlgodHTTPError`, like `AlgodClient`.
+    """
+
+    def __init__(self,
+                 algod_token: str,
+                 algod_address: str,
+                 headers: Optional[dict] = None,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 retries: int = DEFAULT_RETRIES):
+        self.url = algod_address.rstrip('/') + '/v2'
+        self.headers = {**(headers or {}), algod_auth_header: algod_token}
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @classmethod
+    def from_algod(cls, algod: AlgodClient, **kwargs) -> 'AsyncAlgodClient':
+        return cls(algod.algod_token, algod.algod_address, algod.headers, **kwargs)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        # Created lazily since it must be bound to the running event loop.
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+
+    async def request(self, method: str, path: str, data: bytes = None, headers: dict = None) -> Any:
+        session = self.session
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._semaphore:
+                    async with session.request(method, self.url + path, data=data, headers=headers) as response:
+                        if response.status < 400:
+                            return await response.json(content_type=None)
+                        message = await _error_message(response)
+                        if response.status < 500 or attempt == self.retries:
+                            raise AlgodHTTPError(message, response.status)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    raise AlgodHTTPError(f'{method} {path} failed: {e!r}')
+            await asyncio.sleep(DEFAULT_BACKOFF * 2 ** attempt)
+
+    async def account_info(self, address: str) -> dict:
+        return await self.request('GET', f'/accounts/{address}')
+
+    async def asset_info(self, index: int) -> dict:
+        return await self.request('GET', f'/assets/{index}')
+
+    async def fetch_state(self, query: StateQuery) -> List[dict]:
+        return query.parse(await self.request('GET', query.path))
+
+    async def suggested_params(self) -> transaction.SuggestedParams:
+        res = await self.request('GET', '/transactions/params')
+        return transaction.SuggestedParams(
+            res['fee'],
+            res['last-round'],
+            res['last-round'] + 1000,
+            res['genesis-hash'],
+            res['genesis-id'],
+            False,
+            res['consensus-version'],
+            res['min-fee'],
+        )
+
+    async def send_raw_transactions(self, data: bytes) -> str:
+        """Broadcasts a group of signed transactions already encoded as msgpack."""
+        response = await self.request('POST', '/transactions', data=data, headers={'Content-Type': 'application/x-binary'})
+        return response['txId']
+
+    async def simulate_raw_transactions(self, signed_txns: List[dict]) -> dict:
+        """Simulates a group of signed transaction maps against the latest round, without broadcasting it."""
+        request = {'txn-groups': [{'txns': signed_txns}]}
+        data = msgpack.packb(request, use_bin_type=True)
+        return await self.request('POST', '/transactions/simulate', data=data, headers={'Content-Type': 'application/msgpack'})
+
+
+async def _error_message(response: aiohttp.ClientResponse) -> str:
+    """The `message` of an algod error response, or its body if it isn't JSON, like the error pages of proxies."""
+    try:
+        body = await response.json(content_type=None)
+    except json.JSONDecodeError:
+        return (await response.text()).strip() or response.reason
+    if isinstance(body, dict) and 'message' in body:
+        return body['message']
+    return response.reason
+
+
+async def refresh_pools(client: AsyncAlgodClient, pools: list) -> list:
+    """Refreshes `pools` concurrently, each from its `state_query` or through its SDK, returning the pools that failed to refresh."""
+    async def refresh(pool):
+        with METRICS.span('pool_refresh', dex=pool.__class__.__name__):
+            if (query := pool.state_query()) is None:
+                await asyncio.to_thread(pool.refresh_state)
+            else:
+                pool.load_state(await client.fetch_state(query))
+
+    failed = []
+    results = await asyncio.gather(*(refresh(pool) for pool in pools), return_exceptions=True)
+    for pool, result in zip(pools, results):
+        if isinstance(result, Exception):
+            logging.warning(f'Failed refreshing {pool.__class__.__name__} {pool.address}: {result!r}')
+            METRICS.inc('pool_refresh_failures', dex=pool.__class__.__name__)
+            failed.append(pool)
+    return failed
+
+
+async def send_groups(client: AsyncAlgodClient, groups: List[bytes]) -> List[Optional[str]]:
+    """Broadcasts encoded signed groups concurrently, returning their first transaction id or None if it failed."""
+    results = await asyncio.gather(*(client.send_raw_transactions(group) for group in groups), return_exceptions=True)
+    txids = []
+    for result in results:
+        if isinstance(result, Exception):
+            logging.warning(f'Failed sending transaction group: {result!r}')
+            METRICS.inc('transaction_failures')
+            result = None
+        txids.append(result)
+    return txids
+
+
+class EventLoopThread:
+    """A persistent event loop on a daemon thread, so synchronous code can run
+    coroutines without losing the connection pool between calls."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+
+    def run(self, coroutine: Awaitable, timeout: float = None) -> Any:
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
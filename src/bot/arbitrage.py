@@ -4,15 +4,18 @@ import networkx
 import numpy as np
 import matplotlib.pyplot as plt
 
-from .asset import Asset, ALGO
-from .pool import BasePool, ArbitrageAtomicTransaction
+from .asset import Asset
+from .pool import BasePool, ArbitrageAtomicTransaction, profit_in_algo
 from .account import Account
+from .cycles import CycleIndex
 
 DEFAULT_MIN_AMOUNT_IN = 10_000
 DEFAULT_STEP = 10_000
 DEFAULT_PRECISION = 100
 DEFAULT_MAX_ITERATIONS = 10
 DEFAULT_GRAPH_NUM = 1000
+DEFAULT_REFINE_SAMPLES = 32
+DEFAULT_REFINE_TOLERANCE = 0.01
 
 
 class ArbitragePath:
@@ -25,7 +28,7 @@ class ArbitragePath:
         assert self.edges[0].asset_in == self.edges[-1].asset_out
 
     def __repr__(self):
-        assets = [str(edge.asset_in) for edge in self.edges] + [self.asset]
+        assets = [str(edge.asset_in) for edge in self.edges] + [str(self.asset)]
         return f"{self.__class__.__name__}<{'|'.join(assets)}>"
 
     def amount_out(self, amount_in: int) -> int:
@@ -33,15 +36,26 @@ class ArbitragePath:
             if amount_in == 0:
                 break
             asset_in = edge.asset_in
-            amount_in = edge.pool.amount_out(asset_in, amount_in)
+            amount_in = edge.pool.quote(asset_in, amount_in)
         return amount_in
 
+    def amount_out_array(self, amounts_in: np.ndarray) -> np.ndarray:
+        """Quotes an array of input amounts through the whole path at once."""
+        amounts = np.asarray(amounts_in, dtype=np.int64)
+        for edge in self.edges:
+            amounts = edge.pool.amount_out_array(edge.asset_in, amounts)
+        return amounts
+
     def profit(self, amount_in: int) -> int:
         return self.amount_out(amount_in) - amount_in
 
-    def profit_after_fee(self, amount_in: int, suggested_params: dict) -> int:
-        assert self.asset == ALGO
-        return self.profit(amount_in) - self.fee(suggested_params)
+    def profit_array(self, amounts_in: np.ndarray) -> np.ndarray:
+        amounts_in = np.asarray(amounts_in, dtype=np.int64)
+        return self.amount_out_array(amounts_in) - amounts_in
+
+    def profit_after_fee(self, amount_in: int, suggested_params: dict, price: float = None) -> int:
+        """Profit in ALGO net of fees, converting the profit at `price` ALGO per unit of `asset`, as given by a `Numeraire`."""
+        return profit_in_algo(self.asset, self.profit(amount_in), price) - self.fee(suggested_params)
 
     def profit_slope(self, amount_in: int, step: int, centered: bool = True) -> float:
         left, right = amount_in, amount_in + step
@@ -54,7 +68,7 @@ class ArbitragePath:
         return self.profit(amount_in) / amount_in
 
     def optimal_amount_in_precise(self, max_amout_in, min_amount_in = DEFAULT_MIN_AMOUNT_IN, samples = 10, iterations = 100, precision = 100):
-        f = np.vectorize(self.profit)
+        f = self.profit_array
         @np.vectorize
         def corrector(x):
             t = np.array([
@@ -74,6 +88,27 @@ class ArbitragePath:
                 left, right = x[argmax - 1], x[argmax + 1]
         return int(left)
 
+    def optimal_amount_in_analytic(self,
+                                   max_amount_in: int,
+                                   min_amount_in: int = DEFAULT_MIN_AMOUNT_IN,
+                                   samples: int = DEFAULT_REFINE_SAMPLES,
+                                   tolerance: float = DEFAULT_REFINE_TOLERANCE) -> int:
+        """Optimal amount in from the closed form of the path's Möbius function.
+
+        The maximum of ``a x / (b + c x) - x`` is at ``(sqrt(a b) - b) / c``; the
+        result is then refined by quoting `samples` integer amounts within
+        `tolerance` of it, which absorbs the rounding of every hop.
+        Returns 0 if the path isn't profitable even for infinitesimal amounts.
+        """
+        a, b, c = self.mobius()
+        if a <= b:
+            return 0
+        x = min(max((math.sqrt(a * b) - b) / c, min_amount_in), max_amount_in)
+        delta = max(x * tolerance, samples)
+        x = np.linspace(x - delta, x + delta, samples).astype(np.int64)
+        x = np.unique(np.clip(x, min_amount_in, max_amount_in))
+        return int(x[np.argmax(self.profit_array(x))])
+
     def optimal_amount_in_fast(self,
                           max_amount_in: int,
                           min_amount_in = DEFAULT_MIN_AMOUNT_IN,
@@ -98,12 +133,20 @@ class ArbitragePath:
             optimal_amount_in = self.optimal_amount_in_fast(max_amount_in)
         return self.profit(optimal_amount_in)
 
-    def maximum_profit_after_fee(self, max_amount_in: int, suggested_params: dict, precise: bool = False) -> int:
+    def maximum_profit_after_fee(self, max_amount_in: int, suggested_params: dict, precise: bool = False, price: float = None) -> int:
         if precise:
             optimal_amount_in = self.optimal_amount_in_precise(max_amount_in)
         else:
             optimal_amount_in = self.optimal_amount_in_fast(max_amount_in)
-        return self.profit_after_fee(optimal_amount_in, suggested_params)
+        return self.profit_after_fee(optimal_amount_in, suggested_params, price)
+
+    def mobius(self) -> Tuple[float, float, float]:
+        """Coefficients `(a, b, c)` of the whole path as a single ``a x / (b + c x)``."""
+        a, b, c = 1.0, 1.0, 0.0
+        for edge in self.edges:
+            _a, _b, _c = edge.pool.mobius(edge.asset_in)
+            a, b, c = a * _a, b * _b, _b * c + _c * a
+        return a, b, c
 
     @property
     def ratio(self) -> float:
@@ -125,7 +168,7 @@ class ArbitragePath:
         swap_txns = []
         for edge in self.edges:
             asset_in = edge.asset_in
-            amount_out = edge.pool.amount_out(asset_in, amount_in)
+            amount_out = edge.pool.quote(asset_in, amount_in)
             swap_txn = edge.pool.prepare_swap_txn(account, asset_in, amount_in, amount_out, suggested_params)
             amount_in = amount_out
             swap_txns.append(swap_txn)
@@ -137,9 +180,8 @@ class ArbitragePath:
              min_amount_in: int,
              max_amount_in: int,
              num: int = DEFAULT_GRAPH_NUM):
-        f = np.vectorize(lambda x: self.amount_out(x))
         x = np.linspace(min_amount_in, max_amount_in, num, dtype=int)
-        y = f(x)
+        y = self.amount_out_array(x)
 
         plt.plot(x, y)
 
@@ -147,9 +189,8 @@ class ArbitragePath:
                     min_amount_in: int,
                     max_amount_in: int,
                     num: int = DEFAULT_GRAPH_NUM):
-        f = np.vectorize(lambda x: self.amount_out(x))
         x = np.linspace(min_amount_in, max_amount_in, num, dtype=int)
-        y = f(x) - x
+        y = self.profit_array(x)
 
         plt.plot(x, y)
 
@@ -158,9 +199,8 @@ class ArbitragePath:
                               max_amount_in: int,
                               suggested_params: dict,
                               num: int = DEFAULT_GRAPH_NUM):
-        f = np.vectorize(lambda x: self.amount_out(x))
         x = np.linspace(min_amount_in, max_amount_in, num, dtype=int)
-        y = f(x) - x - self.fee(suggested_params)
+        y = self.profit_array(x) - self.fee(suggested_params)
 
         plt.plot(x, y)
 
@@ -191,9 +231,8 @@ class ArbitrageEdge:
               min_amount_in: int,
               max_amount_in: int,
               num: int = DEFAULT_GRAPH_NUM):
-        f = np.vectorize(lambda x: self.pool.amount_out(self.asset_in, x))
         x = np.linspace(min_amount_in, max_amount_in, num, dtype=int)
-        y = f(x)
+        y = self.pool.amount_out_array(self.asset_in, x)
 
         plt.plot(x, y)
 
@@ -205,19 +244,84 @@ class ArbitrageGraph:
         self.construct_graph()
 
     def construct_graph(self):
+        """Builds the graph with an edge per pool and direction, and `hop_graph` with
+        one edge per pair of assets, whose `pools` are the parallel edges of `graph`."""
         self.graph = networkx.MultiDiGraph()
+        self.hop_graph = networkx.DiGraph()
+        self._keys = {}
         for pool in self.pools:
             for asset_in in pool.assets:
-                self.graph.add_edge(asset_in, pool.get_other_asset(asset_in), pool=pool)
+                asset_out = pool.get_other_asset(asset_in)
+                key = self.graph.add_edge(asset_in, asset_out, pool=pool)
+                self._keys[pool, asset_in] = key
+                if not self.hop_graph.has_edge(asset_in, asset_out):
+                    self.hop_graph.add_edge(asset_in, asset_out, pools=[])
+                self.hop_graph[asset_in][asset_out]['pools'].append(pool)
+        self._indexes = {}
+
+    def add_pool(self, pool: BasePool):
+        self.pools.append(pool)
+        self.construct_graph()
 
-    def get_paths(self, main_asset: Asset, cutoff: int, filter=None) -> Iterable[ArbitragePath]:
+    def remove_pool(self, pool: BasePool):
+        self.pools.remove(pool)
+        self.construct_graph()
+
+    def compile_bases(self, assets: Iterable[Asset], cutoff: int) -> CycleIndex:
+        """Returns the cycles through any of `assets` in a single index, see `CycleIndex.concat`."""
+        return CycleIndex.concat([self.compile(asset, cutoff) for asset in assets])
+
+    def compile(self, main_asset: Asset, cutoff: int) -> CycleIndex:
+        """Returns the cycles through `main_asset`, enumerating them only once per topology.
+
+        Cycles are enumerated over `hop_graph`, so parallel pools don't multiply
+        them; each path goes through the first pool of every hop until
+        `CycleIndex.select` picks the best ones.
+        """
         if main_asset not in self.graph:
             raise ValueError('`main_asset` must be an asset in at least one pool.')
+
+        key = (main_asset, cutoff)
+        if key not in self._indexes:
+            paths = [
+                self.path([(self.hop_graph[u][v]['pools'][0], u) for u, v in cycle])
+                for cycle in find_cycles(self.hop_graph, main_asset, cutoff)
+            ]
+            self._indexes[key] = CycleIndex(main_asset, self, paths, cutoff)
+        return self._indexes[key]
+
+    def load_index(self, main_asset: Asset, cutoff: int, hops: np.ndarray, directions: np.ndarray) -> CycleIndex:
+        """Restores a compiled `CycleIndex` from its tables instead of enumerating the cycles.
+
+        Cycles going through the same assets, from tables compiled before
+        parallel pools were grouped, are only kept once.
+        """
+        paths = []
+        seen = set()
+        for pool_ids, _directions in zip(hops, directions):
+            cycle = []
+            for pool_id, direction in zip(pool_ids, _directions):
+                if pool_id < 0:
+                    break
+                pool = self.pools[pool_id]
+                cycle.append((pool, pool.assets[direction]))
+            assets = tuple(asset_in for _, asset_in in cycle)
+            if assets not in seen:
+                seen.add(assets)
+                paths.append(self.path(cycle))
+
+        self._indexes[main_asset, cutoff] = CycleIndex(main_asset, self, paths, cutoff)
+        return self._indexes[main_asset, cutoff]
+
+    def path(self, hops: Iterable[Tuple[BasePool, Asset]]) -> ArbitragePath:
+        """The path swapping `asset_in` on `pool` for every `(pool, asset_in)` of `hops`, in order."""
+        return ArbitragePath(self.graph, [(asset_in, pool.get_other_asset(asset_in), self._keys[pool, asset_in]) for pool, asset_in in hops])
+
+    def get_paths(self, main_asset: Asset, cutoff: int, filter=None) -> Iterable[ArbitragePath]:
         if filter is None:
             filter = lambda x: True
 
-        for cycle in find_cycles(self.graph, main_asset, cutoff):
-            path = ArbitragePath(self.graph, cycle)
+        for path in self.compile(main_asset, cutoff).paths:
             if filter(path):
                 yield path
 
@@ -254,8 +358,9 @@ class ArbitrageGraph:
 
 
 def find_cycles(G: networkx.Graph, source: any, cutoff: int):
+    edges = (lambda node: G.edges(node, keys=True)) if G.is_multigraph() else G.edges
     path = []
-    stack = [iter(G.edges(source, keys=True))]
+    stack = [iter(edges(source))]
 
     while stack:
         children = stack[-1]
@@ -266,11 +371,11 @@ def find_cycles(G: networkx.Graph, source: any, cutoff: int):
                     yield path + [child]
                 else:
                     path.append(child)
-                    stack.append(iter(G.edges(child[1], keys=True)))
+                    stack.append(iter(edges(child[1])))
             else:
-                for (u, v, k) in [child] + list(children):
-                    if v == source:
-                        yield path + [(u, v, k)]
+                for edge in [child] + list(children):
+                    if edge[1] == source:
+                        yield path + [edge]
         except StopIteration:
             stack.pop()
             if path:
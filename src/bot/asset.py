@@ -1,8 +1,13 @@
+from typing import Dict, Optional, Tuple
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, astuple
+import threading
+import json
 
 from algosdk.v2client.algod import AlgodClient
 
+DEFAULT_ASSET_CACHE_FILE = 'assets.json'
+
 
 @dataclass
 class Asset:
@@ -16,18 +21,37 @@ class Asset:
         return 10**self.decimals
 
     @classmethod
-    def from_index(cls, algod: AlgodClient, index: int) -> 'Asset':
+    def from_index(cls, algod: AlgodClient, index: int, registry: 'AssetRegistry' = None) -> 'Asset':
+        if index != 0:
+            registry = registry or REGISTRY
+            if (asset := registry.get(index)) is None:
+                asset = cls._from_params(index, algod.asset_info(index)['params'])
+                registry.add(asset)
+            return asset
+        else:
+            return ALGO
+
+    @classmethod
+    async def from_index_async(cls, client, index: int, registry: 'AssetRegistry' = None) -> 'Asset':
+        """Same as `from_index` through an `AsyncAlgodClient`."""
         if index != 0:
-            params = algod.asset_info(index)['params']
-            return cls(
-                index=index,
-                decimals=params['decimals'],
-                name=params['name'],
-                unit=params['unit-name']
-            )
+            registry = registry or REGISTRY
+            if (asset := registry.get(index)) is None:
+                asset = cls._from_params(index, (await client.asset_info(index))['params'])
+                registry.add(asset)
+            return asset
         else:
             return ALGO
 
+    @classmethod
+    def _from_params(cls, index: int, params: dict) -> 'Asset':
+        return cls(
+            index=index,
+            decimals=params['decimals'],
+            name=params['name'],
+            unit=params['unit-name']
+        )
+
     def __str__(self):
         return self.name
 
@@ -48,6 +72,73 @@ class Asset:
 ALGO = Asset(index=0, decimals=6, name='ALGO', unit='ALGO')
 
 
+class AssetRegistry:
+    """Memoized asset metadata backed by a JSON file.
+
+    Asset parameters are immutable, so entries are only refetched when they
+    are older than `max_age` rounds (never, by default). Entries are stamped
+    with the latest round passed to `observe_round`. New entries are only
+    written to the file by `flush`, once per round and on shutdown.
+    """
+
+    def __init__(self, filename: str = DEFAULT_ASSET_CACHE_FILE, max_age: int = None):
+        self.filename = filename
+        self.max_age = max_age
+        self.round = 0
+        self._entries: Dict[int, Tuple[Asset, int]] = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def get(self, index: int) -> Optional[Asset]:
+        if self._entries is None:
+            self.load()
+        try:
+            asset, round = self._entries[index]
+        except KeyError:
+            return None
+        if self.max_age is not None and self.round - round > self.max_age:
+            return None
+        return asset
+
+    def add(self, asset: Asset) -> None:
+        with self._lock:
+            if self._entries is None:
+                self.load()
+            self._entries[asset.index] = (asset, self.round)
+            self._dirty = True
+
+    def flush(self) -> None:
+        """Saves the entries if any was added since the last save."""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            entries = dict(self._entries)
+        self.save(entries)
+
+    def observe_round(self, round: int) -> None:
+        self.round = max(self.round, round)
+
+    def load(self) -> None:
+        try:
+            with open(self.filename) as fp:
+                entries = json.load(fp)
+        except (FileNotFoundError, json.JSONDecodeError):
+            entries = []
+        self._entries = {entry['index']: (Asset(*entry['asset']), entry['round']) for entry in entries}
+
+    def save(self, entries: Dict[int, Tuple[Asset, int]] = None) -> None:
+        entries = [
+            {'index': index, 'round': round, 'asset': astuple(asset)}
+            for index, (asset, round) in (entries if entries is not None else self._entries).items()
+        ]
+        with open(self.filename, 'w') as fp:
+            json.dump(entries, fp)
+
+
+REGISTRY = AssetRegistry()
+
+
 class AssetID(Enum):
     USDC = 31566704
     GALGO = 793124631
@@ -0,0 +1,128 @@
+"""Negative cycle detection over the edges of a `ReserveBook`.
+
+The weight of edge `2 i + d`, pool `i` swapped in direction `d`, is minus its
+marginal log-rate after the pool fee, so a cycle is profitable at the margin
+exactly when its total weight is negative, whatever its length.
+"""
+from typing import List
+
+import numpy as np
+
+from .pool import BasePool
+from .screening import ReserveBook
+
+DEFAULT_MAX_CYCLE_LENGTH = 8
+DEFAULT_TOLERANCE = 1e-12
+
+
+class BellmanFord:
+    """Vectorized Bellman-Ford over the assets of `pools`.
+
+    Every asset starts at distance 0, as if linked to a virtual source, so every
+    negative cycle is reachable. Each iteration relaxes at once the edges out
+    of the assets whose distance changed in the previous one, like SPFA, and
+    the distances and predecessors are kept between calls: `update` starts from
+    the edges of the changed pools only. The assets whose shortest path went
+    through an edge that got heavier are reset to the virtual source first,
+    along with everything reached through them.
+
+    Negative cycles keep improving the distances of their assets, so after as
+    many iterations as there are assets, the cycles of the predecessor graph
+    reached from the assets still improving are returned, and then reset.
+    """
+
+    def __init__(self, pools: List[BasePool], max_cycle_length: int = DEFAULT_MAX_CYCLE_LENGTH, tolerance: float = DEFAULT_TOLERANCE):
+        self.pools = pools
+        self.assets = sorted({asset for pool in pools for asset in pool.assets})
+        ids = {asset: i for i, asset in enumerate(self.assets)}
+        self.src = np.array([ids[pool.assets[d]] for pool in pools for d in (0, 1)], dtype=np.int64)
+        self.dst = np.array([ids[pool.assets[1 - d]] for pool in pools for d in (0, 1)], dtype=np.int64)
+        self.max_cycle_length = max_cycle_length
+        self.tolerance = tolerance
+
+        self.weights = np.zeros(len(self.src))
+        self.dist = np.zeros(len(self.assets))
+        self.pred = np.full(len(self.assets), -1, dtype=np.int64)
+        # Assets reset after their cycle was found, to be relaxed again on the next update.
+        self._pending = np.zeros(len(self.assets), dtype=bool)
+
+    def update(self, book: ReserveBook, changed: np.ndarray) -> List[np.ndarray]:
+        """Relaxes the edges of the pools `changed` in `book` and returns the negative cycles found, as edge ids."""
+        weights = -book.edge_log_rates()
+        edges = np.concatenate([2 * changed, 2 * changed + 1]).astype(np.int64)
+        heavier = edges[weights[edges] > self.weights[edges]]
+        self.weights = weights
+
+        reset = self._reached_from(np.isin(self.pred, heavier)) | self._pending
+        self._reset(reset)
+        self._pending = np.zeros(len(self.assets), dtype=bool)
+        active = reset.copy()
+        active[self.src[edges]] = True
+        active[self.src[reset[self.dst]]] = True
+
+        for _ in range(len(self.assets)):
+            active = self._relax(active)
+            if not active.any():
+                return []
+
+        cycles = self._cycles(np.flatnonzero(active))
+        if cycles:
+            self._pending = self._reached_from(np.isin(self.pred, np.concatenate(cycles)))
+            self._reset(self._pending)
+        return [cycle for cycle in cycles if len(cycle) <= self.max_cycle_length]
+
+    def _relax(self, active: np.ndarray) -> np.ndarray:
+        """Relaxes the edges out of `active` assets, returning the assets whose distance improved."""
+        edges = np.flatnonzero(active[self.src])
+        distances = self.dist[self.src[edges]] + self.weights[edges]
+        improving = distances < self.dist[self.dst[edges]] - self.tolerance
+        edges, distances = edges[improving], distances[improving]
+
+        # Keep the shortest candidate of every destination.
+        order = np.lexsort((distances, self.dst[edges]))
+        edges, distances = edges[order], distances[order]
+        dst = self.dst[edges]
+        first = np.ones(len(dst), dtype=bool)
+        first[1:] = dst[1:] != dst[:-1]
+        self.dist[dst[first]] = distances[first]
+        self.pred[dst[first]] = edges[first]
+
+        improved = np.zeros(len(self.assets), dtype=bool)
+        improved[dst] = True
+        return improved
+
+    def _reached_from(self, mask: np.ndarray) -> np.ndarray:
+        """`mask` extended to the assets whose predecessor chain goes through it."""
+        parent = np.where(self.pred >= 0, self.src[self.pred], -1)
+        has_parent = parent >= 0
+        while True:
+            extended = mask | (has_parent & mask[parent])
+            if (extended == mask).all():
+                return mask
+            mask = extended
+
+    def _reset(self, mask: np.ndarray) -> None:
+        self.dist[mask] = 0
+        self.pred[mask] = -1
+
+    def _cycles(self, assets: np.ndarray) -> List[np.ndarray]:
+        """Negative cycles of the predecessor graph reached from `assets`, as edge ids in swap order."""
+        # Walking back as many steps as there are assets ends on a cycle, if there is one.
+        for _ in range(len(self.assets)):
+            pred = self.pred[assets]
+            assets = np.where(pred >= 0, self.src[np.maximum(pred, 0)], -1)
+            assets = assets[assets >= 0]
+
+        cycles = {}
+        for start in np.unique(assets).tolist():
+            edges, asset = [], start
+            while True:
+                edge = int(self.pred[asset])
+                edges.append(edge)
+                asset = int(self.src[edge])
+                if asset == start:
+                    break
+            key = frozenset(edges)
+            if key not in cycles and self.weights[edges].sum() < -self.tolerance:
+                cycles[key] = np.array(edges[::-1], dtype=np.int64)
+        return list(cycles.values())
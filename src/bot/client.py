@@ -1,24 +1,36 @@
-from typing import List
-from itertools import combinations, product
-from concurrent.futures import ThreadPoolExecutor, wait
-import pickle
+from typing import List, Tuple
+from contextlib import nullcontext
+import asyncio
 import logging
 
 from algosdk.v2client.algod import AlgodClient
 from algosdk.v2client.indexer import IndexerClient
 
-from .asset import Asset, ALGO
-from .pool import BasePool
-from .dex.pactfi import PactfiPool
-from .dex.tinyman import TinymanPool
+from .asset import Asset, ALGO, REGISTRY
+from .pool import BasePool, publish_quote_cache_counts
+from .discovery import PoolDiscovery
 from .arbitrage import ArbitrageGraph
-from .exceptions import PoolFetchError
+from .cycles import CycleIndex
+from .numeraire import Numeraire
+from .search import DEFAULT_SEARCH
+from .pipeline import RoundPipeline
+from .scheduler import RoundScheduler
+from .aio import AsyncAlgodClient, EventLoopThread, refresh_pools, send_groups
+from .snapshot import dump_snapshot, load_snapshot
+from .recording import Recorder
+from .fees import SuggestedParamsCache
+from .templates import GroupBuilder
+from .planner import Plan
+from .simulation import Simulator
+from .metrics import METRICS
+from .profiling import TickProfiler
+from .exceptions import StaleRoundError, PoolTransactionError
 from .account import Account
 
 DEFAULT_CUTOFF = 4
-DEFAULT_PICKLE_FILE = 'pools.pickle'
-DEFAULT_MAX_WORKERS = 5
+DEFAULT_SNAPSHOT_FILE = 'snapshot.json'
 DEFAULT_MAX_AMOUNT_IN = 1_000_000
+DEFAULT_TOP_K = 10
 
 
 class BotClient:
@@ -27,85 +39,212 @@ class BotClient:
         self.algod = algod
         self.indexer = indexer
         self.account = account
-        self.pools = List[BasePool]
+        self.pools: List[BasePool] = []
         self.arbgraph = None
+        self.cycle_tables = {}
+        self.aio = AsyncAlgodClient.from_algod(algod)
+        self.loop = EventLoopThread()
+        self.discovery = PoolDiscovery(algod, indexer)
+        self.params_cache = SuggestedParamsCache()
 
     def fetch_pools(self, assets: List[Asset], dump_state: bool = True):
+        """Probes every DEX for pools between `assets`, skipping pairs already tracked."""
         logging.info('Fetching pools...')
-        self.pools = []
-        classes = [TinymanPool, PactfiPool]
-        for cls, _assets in product(classes, combinations(assets, 2)):
-            if pool := self._fetch_pool(cls, _assets):
-                self.pools.append(pool)
+        if pools := self.discovery.discover(assets, known=self.pools):
+            self.pools.extend(pools)
+            # The topology changed, so snapshot cycles no longer apply.
+            self.cycle_tables = {}
         logging.info('Finished fetching pools.')
 
         if dump_state:
             self.dump_state()
 
     def run(self,
-            main_asset: Asset = ALGO,
+            base_assets: List[Asset] = None,
             cutoff: int = DEFAULT_CUTOFF,
-            max_amount_in: int = DEFAULT_MAX_AMOUNT_IN):
+            max_amount_in: int = DEFAULT_MAX_AMOUNT_IN,
+            search: str = DEFAULT_SEARCH,
+            top_k: int = DEFAULT_TOP_K,
+            workers: int = 0,
+            recorder: Recorder = None,
+            profiler: TickProfiler = None,
+            simulator: Simulator = None):
+        """Searches and submits opportunities every round.
+
+        Cycles start and end at any of `base_assets`, by default the assets
+        the account holds that can be priced in ALGO, and their profits are
+        compared in ALGO, in which `max_amount_in` is also given.
+
+        With the `ENUMERATE` search, the cycles of up to `cutoff` hops are
+        enumerated once and rescored every round; with `BELLMAN_FORD`, cycles
+        of any length up to the group size limit are detected every round
+        instead, see `bot.search`. The `top_k` best opportunities are sized
+        every round. With `workers`, the enumerated cycles are scored in that
+        many processes, see `bot.workers`.
+
+        The reserves of every round are recorded with `recorder`, the rounds
+        are profiled with `profiler` and the groups are simulated with
+        `simulator` before being sent, dropping the unprofitable ones, if given.
+        """
         logging.info('Starting bot...')
         logging.info('Constructing arbitrage graph...')
         self.arbgraph = ArbitrageGraph(self.pools)
-        logging.info('Finished constructing arbitrage graph.')
-
-        while True:
-            self.refresh_state()
-
-            logging.info('Finding possible opportunities...')
-            opportunities = self.arbgraph.find_opportunities(main_asset, cutoff)
-            opportunities = [path for path in opportunities if path.ratio > 0]
-            # opportunities = [path for path in opportunities if path.maximum_profit(max_amount_in) > 0]
-            # opportunities.sort(key=lambda path: -path.maximum_profit(max_amount_in))
-            opportunities.sort(key=lambda path: -path.ratio)
-            logging.info('Opportunities found.')
-
-            for path in opportunities[:10]:
-                optimal_amount_in = int(path.optimal_amount_in_precise(max_amount_in))
-                txn = path.prepare_txn(self.account, optimal_amount_in, self.suggested_params)
-                if txn.profit_after_fee(self.suggested_params) > 0:
-                    txn.send(self.algod)
-                    logging.info('Sent transaction.')
-
-    def refresh_state(self):
+        if base_assets is None:
+            base_assets = self._held_assets() or [ALGO]
+        pools = self.arbgraph.pools
+        pipeline = RoundPipeline(self.arbgraph, base_assets, cutoff, max_amount_in, search, top_k, workers, compile=self._compile)
+        logging.info(f'Finished constructing arbitrage graph, searching cycles from {", ".join(map(str, base_assets))}.')
+
+        logging.info('Preparing swap templates...')
+        self.loop.run(self._refresh_suggested_params())
+        builder = GroupBuilder(self.account)
+        builder.update(self.suggested_params)
+        builder.prepare(pools)
+
+        scheduler = RoundScheduler(self.algod)
+        try:
+            for context in scheduler.rounds():
+                with profiler.tick(context.round) if profiler is not None else nullcontext():
+                    logging.info(f'Processing round {context.round}...')
+                    try:
+                        with context.stage('refresh'):
+                            self.refresh_state(context.round)
+                            pipeline.refresh(self.suggested_params)
+                            builder.update(self.suggested_params)
+                            if recorder is not None:
+                                recorder.record(context.round, pipeline.book)
+
+                        with context.stage('search'):
+                            opportunities = pipeline.search()
+
+                        with context.stage('submit'):
+                            # ALGO pays the fees, even if no cycle starts from it.
+                            budgets = {asset: self.account.get_spendable_balance(asset) for asset in [ALGO, *base_assets]}
+                            plans = pipeline.plan(opportunities, budgets)
+                            if plans:
+                                with METRICS.span('txn_build'):
+                                    plans, groups = self._sign(builder, plans)
+                                if simulator is not None:
+                                    plans, groups = self._simulate(simulator, pipeline.numeraire, plans, groups)
+                                with METRICS.span('submission'):
+                                    txids = self.loop.run(send_groups(self.aio, groups))
+                                sent = sum(txid is not None for txid in txids)
+                                METRICS.observe('round_to_submit_seconds', context.elapsed)
+                                METRICS.inc('transactions_sent', sent)
+                                logging.info(f'Sent {sent} of {len(plans)} transactions, expecting {sum(plan.profit for plan in plans)} profit.')
+                    except StaleRoundError as e:
+                        logging.info(f'{e} Aborting.')
+                    publish_quote_cache_counts(pools)
+                    REGISTRY.flush()
+        finally:
+            pipeline.close()
+
+    def _held_assets(self) -> List[Asset]:
+        """Assets of the graph the account holds and that share a pool with ALGO, to be priced in it."""
+        graph = self.arbgraph.graph
+        return [
+            asset for asset in graph
+            if (asset == ALGO or graph.has_edge(asset, ALGO))
+            and self.account.is_opted_in_asset(asset) and self.account.get_spendable_balance(asset) > 0
+        ]
+
+    def _compile(self, base_assets: List[Asset], cutoff: int) -> CycleIndex:
+        """The cycles through any of `base_assets`, loading the ones in the snapshot instead of enumerating them."""
+        indexes = []
+        compiled = False
+        for asset in base_assets:
+            if (asset, cutoff) in self.cycle_tables:
+                indexes.append(self.arbgraph.load_index(asset, cutoff, *self.cycle_tables[asset, cutoff]))
+            else:
+                indexes.append(self.arbgraph.compile(asset, cutoff))
+                self.cycle_tables[asset, cutoff] = (indexes[-1].hops, indexes[-1].directions)
+                compiled = True
+        if compiled:
+            self.dump_state()
+        return CycleIndex.concat(indexes)
+
+    def _sign(self, builder: GroupBuilder, plans: List[Plan]) -> Tuple[List[Plan], List[bytes]]:
+        """Signs the groups of `plans`, dropping the ones that can't be built."""
+        kept_plans, groups = [], []
+        for plan in plans:
+            try:
+                groups.append(builder.sign(plan.path, plan.amount_in))
+            except PoolTransactionError as e:
+                logging.warning(f'Dropped {plan.path}: {e}')
+                continue
+            kept_plans.append(plan)
+        return kept_plans, groups
+
+    def _simulate(self, simulator: Simulator, numeraire: Numeraire, plans: List[Plan], groups: List[bytes]) -> Tuple[List[Plan], List[bytes]]:
+        """Keeps the plans whose groups are still profitable when simulated."""
+        with METRICS.span('simulation'):
+            results = self.loop.run(simulator.simulate(groups, [plan.path.asset for plan in plans]))
+        kept_plans, kept_groups = [], []
+        for plan, group, result in zip(plans, groups, results):
+            profit = result.profit_after_fee(numeraire.price(plan.path.asset))
+            if profit is not None and profit > 0:
+                kept_plans.append(plan)
+                kept_groups.append(group)
+            else:
+                logging.info(f'Dropped {plan.path} after simulation: {result.failure or f"{profit} profit"}.')
+        METRICS.inc('submissions_saved', len(plans) - len(kept_plans))
+        return kept_plans, kept_groups
+
+    def refresh_state(self, round: int = None):
+        """Refreshes the pools, the account and the suggested params, which are only refetched every few rounds if `round` is given."""
         logging.info('Starting refreshing step...')
-        self._refresh_pools()
-        self._refresh_account()
-
-        logging.info('Getting suggested params...')
-        self.suggested_params = self.algod.suggested_params()
+        self.loop.run(self._refresh_state(round))
         logging.info('Finished refreshing step.')
 
-    def _refresh_pools(self):
+    async def _refresh_state(self, round: int = None):
+        await asyncio.gather(
+            self._refresh_pools(),
+            self._refresh_account(),
+            self._refresh_suggested_params(round)
+        )
+
+    async def _refresh_pools(self):
         logging.info('Refreshing pools...')
-        with ThreadPoolExecutor(DEFAULT_MAX_WORKERS) as executor:
-            futures = [executor.submit(pool.refresh_state) for pool in self.pools]
-            wait(futures)
+        with METRICS.span('pools_refresh'):
+            await refresh_pools(self.aio, self.pools)
         logging.info('Finished refreshing pools.')
 
-    def _refresh_account(self):
+    async def _refresh_account(self):
         logging.info('Refreshing account state...')
-        self.account.refresh_state()
-        logging.info('Finished refreshing pools.')
-
-    def _fetch_pool(self, cls, assets: List[Asset]) -> BasePool:
-        try:
-            pool = cls(self.algod, self.indexer, assets)
-            if pool.supply(assets[0]) == 0 or pool.supply(assets[1]) == 0:
-                raise PoolFetchError
-            print(f"Initialized {pool}.")
-            return pool
-        except PoolFetchError:
-            print(f"Couldn't initiliaze {cls.__name__} with assets {'/'.join(str(asset) for asset in assets)}.")
-
-    def dump_state(self, filename: str = DEFAULT_PICKLE_FILE):
+        with METRICS.span('account_refresh'):
+            await self.account.refresh_state_async(self.aio)
+        logging.info('Finished refreshing account state.')
+
+    async def _refresh_suggested_params(self, round: int = None):
+        if self.params_cache.is_stale(round):
+            logging.info('Getting suggested params...')
+            with METRICS.span('suggested_params'):
+                self.params_cache.update(await self.aio.suggested_params())
+        self.suggested_params = self.params_cache.at(round)
+
+    def close(self):
+        """Closes the connections of the asyncio algod client and saves the new assets."""
+        self.loop.run(self.aio.close())
+        REGISTRY.flush()
+
+    def dump_state(self, filename: str = DEFAULT_SNAPSHOT_FILE):
         logging.info(f'Dumping pools to `{filename}`.')
-        with open(filename, 'wb') as fp:
-            pickle.dump(self.pools, fp)
+        dump_snapshot(filename, self.pools, self.cycle_tables)
+
+    def load_state(self, filename: str = DEFAULT_SNAPSHOT_FILE, validate: bool = True):
+        """Loads the pools and compiled cycles of a snapshot.
 
-    def load_state(self, filename: str = DEFAULT_PICKLE_FILE):
+        With `validate`, the pools are refreshed in bulk and the ones that no
+        longer exist or have no liquidity are dropped, along with the cycles.
+        """
         logging.info(f'Loading pools from `{filename}`.')
-        with open(filename, 'rb') as fp:
-            self.pools = pickle.load(fp)
+        self.pools, self.cycle_tables = load_snapshot(filename, self.algod, self.indexer)
+
+        if validate:
+            failed = self.loop.run(refresh_pools(self.aio, self.pools))
+            pools = [pool for pool in self.pools if pool not in failed and all(pool.supply(asset) for asset in pool.assets)]
+            if len(pools) != len(self.pools):
+                logging.info(f'Dropped {len(self.pools) - len(pools)} stale pools from `{filename}`.')
+                self.pools = pools
+                self.cycle_tables = {}
+        logging.info(f'Loaded {len(self.pools)} pools.')
@@ -0,0 +1,136 @@
+from typing import TYPE_CHECKING, List, Dict
+
+import numpy as np
+import scipy.sparse
+
+from .pool import BasePool
+from .asset import Asset
+
+if TYPE_CHECKING:
+    from .arbitrage import ArbitrageGraph, ArbitragePath
+    from .screening import ReserveBook
+
+
+class CycleIndex:
+    """Cycles of an arbitrage graph compiled into integer tables.
+
+    Row `i` describes the `i`-th cycle: ``hops[i, j]`` is the id of the pool
+    used on hop `j` (-1 past the end of the cycle) and ``directions[i, j]`` is
+    0 when the hop swaps ``pool.assets[0]`` into ``pool.assets[1]`` and 1 otherwise.
+    Pool ids index `pools`. Cycle `i` starts and ends at ``assets[bases[i]]``.
+
+    A hop is really between two assets, ``pairs[i, j]``, which may be listed on
+    several pools: `select` routes every pair through its best pool, so the
+    cycles are only enumerated once per sequence of assets. Edge `2 k + d` is
+    pool `k` swapped in direction `d` and ``pair_edges[p]`` lists the edges of
+    pair `p`, padded with -1.
+
+    Rows with the same ``cycle_keys`` are rotations of one cycle, rooted at
+    different assets; `best_rotations` keeps the most profitable of each.
+    """
+
+    def __init__(self, asset: Asset, graph: 'ArbitrageGraph', paths: list, cutoff: int):
+        self.asset = asset
+        self.assets = [asset]
+        self.graph = graph
+        self.pools: List[BasePool] = graph.pools
+        self.pool_ids: Dict[BasePool, int] = {pool: i for i, pool in enumerate(self.pools)}
+        self.paths = paths
+        self.cutoff = cutoff
+
+        self.hops = np.full((len(paths), cutoff), -1, dtype=np.int32)
+        self.directions = np.zeros((len(paths), cutoff), dtype=np.int8)
+        self.lengths = np.zeros(len(paths), dtype=np.int8)
+        self.bases = np.zeros(len(paths), dtype=np.int32)
+        for i, path in enumerate(paths):
+            self.lengths[i] = len(path.edges)
+            for j, edge in enumerate(path.edges):
+                self.hops[i, j] = self.pool_ids[edge.pool]
+                self.directions[i, j] = edge.asset_in != edge.pool.assets[0]
+
+        pair_ids = {}
+        self.edge_pairs = np.array([
+            pair_ids.setdefault((pool.assets[d], pool.assets[1 - d]), len(pair_ids))
+            for pool in self.pools for d in (0, 1)
+        ], dtype=np.int32)
+        counts = np.bincount(self.edge_pairs, minlength=len(pair_ids))
+        self.pair_edges = np.full((len(pair_ids), counts.max(initial=1)), -1, dtype=np.int64)
+        order = np.argsort(self.edge_pairs, kind='stable')
+        ranks = np.arange(len(order)) - np.repeat(np.cumsum(counts) - counts, counts)
+        self.pair_edges[self.edge_pairs[order], ranks] = order
+
+        mask = self.hops >= 0
+        self.pairs = np.where(mask, self.edge_pairs[2 * np.maximum(self.hops, 0) + self.directions], -1)
+        # Rooted at a single asset, cycles don't repeat; see `concat`.
+        self.cycle_keys = np.arange(len(paths), dtype=np.int64)
+        rows = np.repeat(np.arange(len(paths)), self.lengths)
+        pair_cycles = scipy.sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (self.pairs[mask], rows)),
+            shape=(len(pair_ids), len(paths))
+        )
+        pool_pairs = scipy.sparse.csr_matrix(
+            (np.ones(len(self.edge_pairs), dtype=np.int32), (np.arange(len(self.edge_pairs)) // 2, self.edge_pairs)),
+            shape=(len(self.pools), len(pair_ids))
+        )
+        self.pool_cycles = (pool_pairs @ pair_cycles).tocsr()
+
+    @classmethod
+    def concat(cls, indexes: List['CycleIndex']) -> 'CycleIndex':
+        """Joins indexes over the same pools rooted at different assets into one, keying the rotations of each cycle."""
+        first = indexes[0]
+        paths = [path for index in indexes for path in index.paths]
+        joined = cls(first.asset, first.graph, paths, max(index.cutoff for index in indexes))
+        joined.assets = [index.asset for index in indexes]
+        joined.bases = np.repeat(np.arange(len(indexes), dtype=np.int32), [len(index) for index in indexes])
+        joined.cycle_keys = joined._rotation_keys()
+        return joined
+
+    def _rotation_keys(self) -> np.ndarray:
+        """Ids of the sequences of pairs of the cycles, up to rotation."""
+        keys = {}
+        cycle_keys = np.zeros(len(self.paths), dtype=np.int64)
+        for i, pairs in enumerate(self.pairs.tolist()):
+            pairs = pairs[:self.lengths[i]]
+            rotation = min(tuple(pairs[k:] + pairs[:k]) for k in range(len(pairs)))
+            cycle_keys[i] = keys.setdefault(rotation, len(keys))
+        return cycle_keys
+
+    def best_rotations(self, cycle_ids: np.ndarray, profits: np.ndarray) -> np.ndarray:
+        """Mask of the cycles `cycle_ids` with the best of `profits` among the rotations of their cycle in `cycle_ids`."""
+        keys = self.cycle_keys[cycle_ids]
+        order = np.lexsort((-profits, keys))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = keys[order[1:]] != keys[order[:-1]]
+        best = np.zeros(len(order), dtype=bool)
+        best[order[first]] = True
+        return best
+
+    def select(self, book: 'ReserveBook') -> None:
+        """Routes every hop through the pool of its pair with the best marginal rate after fee in `book`."""
+        rates = book.edge_log_rates()
+        candidates = np.where(self.pair_edges >= 0, rates[self.pair_edges], -np.inf)
+        best = self.pair_edges[np.arange(len(self.pair_edges)), np.argmax(candidates, axis=1)]
+        mask = self.pairs >= 0
+        edges = best[np.maximum(self.pairs, 0)]
+        self.hops = np.where(mask, edges // 2, -1).astype(np.int32)
+        self.directions = np.where(mask, edges % 2, 0).astype(np.int8)
+
+    def path(self, i: int) -> 'ArbitragePath':
+        """Cycle `i` through the pools currently selected for its hops."""
+        pools = [self.pools[pool_id] for pool_id in self.hops[i, :self.lengths[i]]]
+        return self.graph.path([(pool, pool.assets[d]) for pool, d in zip(pools, self.directions[i])])
+
+    def cycles_touching(self, pool_ids: np.ndarray) -> np.ndarray:
+        """Ids of the cycles with a hop that can swap on any of the pools `pool_ids`."""
+        return np.unique(self.pool_cycles[pool_ids].indices)
+
+    def cycles_rooted_at(self, bases: np.ndarray) -> np.ndarray:
+        """Ids of the cycles with a rotation starting at any of ``assets[bases]``, and of those rotations."""
+        keys = np.unique(self.cycle_keys[np.isin(self.bases, bases)])
+        return np.flatnonzero(np.isin(self.cycle_keys, keys))
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}<{len(self)} cycles, {len(self.pools)} pools>'
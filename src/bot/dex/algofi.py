@@ -0,0 +1,97 @@
+from algosdk.v2client.algod import AlgodClient
+from algosdk.v2client.indexer import IndexerClient
+
+import numpy as np
+from algofi.amm.v1.client import AlgofiAMMMainnetClient
+from algofi.amm.v1.config import PoolType, PoolStatus
+
+from ..asset import Asset
+from ..pool import Pool
+from ..quote import algofi_amount_out, algofi_amount_out_array
+from ..exceptions import PoolFetchError
+
+# Probed in order, a pair only being tracked through its first active pool.
+POOL_TYPES = ('CONSTANT_PRODUCT_25BP_FEE', 'CONSTANT_PRODUCT_75BP_FEE')
+FEE_BPS = {'CONSTANT_PRODUCT_25BP_FEE': 25, 'CONSTANT_PRODUCT_75BP_FEE': 75}
+
+
+class AlgofiClient(AlgofiAMMMainnetClient):
+    """Algofi AMM client with the `fetch_asset` lookup of the other DEX clients, memoized by `PoolDiscovery`."""
+
+    def fetch_asset(self, asset_id: int):
+        return self.get_asset(asset_id)
+
+
+class AlgofiPool(Pool):
+    """Algofi constant product pools, quoted exactly from their reserves, see `bot.quote`.
+
+    NanoSwap stable pools aren't tracked.
+    """
+
+    # The transfer in, and the application call paying for the transfer out.
+    swap_min_fees = 3
+    # `sef`, minimum amount out.
+    swap_min_out_arg = 1
+
+    def __init__(self, algod: AlgodClient, indexer: IndexerClient, assets: tuple[Asset, Asset], client: AlgofiClient = None):
+        super().__init__(algod, indexer, assets)
+
+        self._client = client
+        self._load_sdk()
+        self._address = self._pool.address
+        self._app_id = self._pool.application_id
+
+        self.refresh_state()
+
+    @classmethod
+    def create_client(cls, algod: AlgodClient) -> AlgofiClient:
+        return AlgofiClient(algod_client=algod)
+
+    def _load_sdk(self):
+        client = self._client or self.create_client(self.algod)
+        self._sdk_assets = {asset: client.fetch_asset(asset.index) for asset in self.assets}
+        asset1, asset2 = sorted(asset.index for asset in self.assets)
+        if hasattr(self, '_pool_type'):
+            self._sdk_pool = client.get_pool(PoolType[self._pool_type], asset1, asset2)
+            return
+        for pool_type in POOL_TYPES:
+            pool = client.get_pool(PoolType[pool_type], asset1, asset2)
+            if pool.pool_status == PoolStatus.ACTIVE:
+                self._sdk_pool = pool
+                self._pool_type = pool_type
+                return
+        raise PoolFetchError
+
+    def refresh_state(self):
+        self._pool.refresh_state()
+        self._set_state(self._pool.asset1_balance, self._pool.asset2_balance)
+
+    def _set_state(self, asset1_balance: int, asset2_balance: int):
+        if not asset1_balance or not asset2_balance:
+            raise PoolFetchError
+        # Algofi orders the assets of a pool by index.
+        self._supply = {asset: supply for asset, supply in zip(sorted(self.assets), (asset1_balance, asset2_balance))}
+        self.fee_bps = FEE_BPS[self._pool_type]
+
+    def to_snapshot(self) -> dict:
+        return {**super().to_snapshot(), 'pool_type': self._pool_type}
+
+    @classmethod
+    def from_snapshot(cls, algod: AlgodClient, indexer: IndexerClient, record: dict, assets: dict) -> 'AlgofiPool':
+        pool = super().from_snapshot(algod, indexer, record, assets)
+        pool._pool_type = record['pool_type']
+        return pool
+
+    def amount_out(self, asset_in: Asset, amount_in: int) -> int:
+        asset_out = self.get_other_asset(asset_in)
+        return algofi_amount_out(self._supply[asset_in], self._supply[asset_out], amount_in, self.fee_bps)
+
+    def amount_out_array(self, asset_in: Asset, amounts_in: np.ndarray) -> np.ndarray:
+        asset_out = self.get_other_asset(asset_in)
+        return algofi_amount_out_array(self._supply[asset_in], self._supply[asset_out], amounts_in, self.fee_bps)
+
+    def prepare_internal_swap_txns(self, sender: str, asset_in: Asset, amount_in: int, amount_out: int, suggested_params: dict):
+        txns = self._pool.get_swap_exact_for_txns(sender, self._assets[asset_in], amount_in, amount_out, params=suggested_params).transactions
+        for txn in txns:
+            txn.group = 0
+        return txns
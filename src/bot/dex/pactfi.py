@@ -1,42 +1,106 @@
 from algosdk.v2client.algod import AlgodClient
 from algosdk.v2client.indexer import IndexerClient
 
+import numpy as np
 from pactsdk.client import PactClient
+from pactsdk.pool_state import AppInternalState, parse_global_pool_state
 
 from ..asset import Asset
-from ..pool import Pool
+from ..pool import Pool, fit_mobius
+from ..quote import BPS, pactfi_amount_out, pactfi_amount_out_array
+from ..state import StateQuery
 from ..exceptions import PoolFetchError
 
 
 class PactfiPool(Pool):
 
-    def __init__(self, algod: AlgodClient, indexer: IndexerClient, assets: tuple[Asset, Asset]):
+    # `SWAP`, minimum amount out.
+    swap_min_out_arg = 1
+
+    def __init__(self, algod: AlgodClient, indexer: IndexerClient, assets: tuple[Asset, Asset], client: PactClient = None):
         super().__init__(algod, indexer, assets)
 
-        client = PactClient(algod)
-        self._assets = {asset: client.fetch_asset(asset.index) for asset in assets}
-        try:
-            self._pool = client.fetch_pools_by_assets(*self._assets.values())[0]
-        except IndexError:
-            raise PoolFetchError
+        self._client = client
+        self._load_sdk()
         self._address = self._pool.get_escrow_address()
+        self._app_id = self._pool.app_id
+        self._pool_type = self._pool.pool_type
 
         self.refresh_state()
 
+    @classmethod
+    def create_client(cls, algod: AlgodClient) -> PactClient:
+        return PactClient(algod)
+
+    def _load_sdk(self):
+        client = self._client or self.create_client(self.algod)
+        self._sdk_assets = {asset: client.fetch_asset(asset.index) for asset in self.assets}
+        if hasattr(self, '_app_id'):
+            self._sdk_pool = client.fetch_pool_by_id(self._app_id)
+            return
+        try:
+            self._sdk_pool = client.fetch_pools_by_assets(*self._sdk_assets.values())[0]
+        except IndexError:
+            raise PoolFetchError
+
     def refresh_state(self):
         self._pool.update_state()
+        self._set_state(self._pool.internal_state)
 
-        if self.assets[0].index == self._pool.primary_asset.index:
+    def state_query(self) -> StateQuery:
+        return StateQuery(self._app_id)
+
+    def load_state(self, key_values: list[dict]):
+        internal_state = parse_global_pool_state(key_values)
+        if self._sdk_pool is not None:
+            self._sdk_pool.internal_state = internal_state
+            self._sdk_pool.state = self._sdk_pool.parse_internal_state(internal_state)
+            self._sdk_pool.fee_bps = internal_state.FEE_BPS
+        self._set_state(internal_state)
+
+    def _set_state(self, internal_state: AppInternalState):
+        if self.assets[0].index == internal_state.ASSET_A:
             primary_asset = self.assets[0]
         else:
             primary_asset = self.assets[1]
         secondary_asset = self.get_other_asset(primary_asset)
         self._supply = {
-            primary_asset: self._pool.state.total_primary,
-            secondary_asset: self._pool.state.total_secondary
+            primary_asset: internal_state.A,
+            secondary_asset: internal_state.B
         }
+        self.fee_bps = internal_state.FEE_BPS
+
+    @property
+    def is_constant_product(self) -> bool:
+        return self._pool_type in ('CONSTANT_PRODUCT', 'NFT_CONSTANT_PRODUCT')
+
+    @property
+    def swap_min_fees(self) -> int:
+        # The transfer in, and the application call paying for the transfer out. The
+        # stableswap application call pays for the iterations of its invariant as well.
+        return 3 if self.is_constant_product else None
+
+    def to_snapshot(self) -> dict:
+        return {**super().to_snapshot(), 'pool_type': self._pool_type}
+
+    @classmethod
+    def from_snapshot(cls, algod: AlgodClient, indexer: IndexerClient, record: dict, assets: dict) -> 'PactfiPool':
+        pool = super().from_snapshot(algod, indexer, record, assets)
+        pool._pool_type = record['pool_type']
+        return pool
+
+    def mobius(self, asset_in: Asset) -> tuple[float, float, float]:
+        if not self.is_constant_product:
+            return fit_mobius(lambda amount_in: self.quote(asset_in, amount_in), self._supply[asset_in])
+        # Pact charges the fee on the amount out.
+        gamma = 1 - self.fee_bps / BPS
+        return gamma * self._supply[self.get_other_asset(asset_in)], self._supply[asset_in], 1.0
 
     def amount_out(self, asset_in: Asset, amount_in: int) -> int:
+        if self.is_constant_product:
+            asset_out = self.get_other_asset(asset_in)
+            return pactfi_amount_out(self._supply[asset_in], self._supply[asset_out], amount_in, self.fee_bps)
+
         if asset_in.index == self._pool.primary_asset.index:
             _asset_in = self._pool.primary_asset
         else:
@@ -46,6 +110,12 @@ class PactfiPool(Pool):
 
         return amount_out
 
+    def amount_out_array(self, asset_in: Asset, amounts_in: np.ndarray) -> np.ndarray:
+        if self.is_constant_product:
+            asset_out = self.get_other_asset(asset_in)
+            return pactfi_amount_out_array(self._supply[asset_in], self._supply[asset_out], amounts_in, self.fee_bps)
+        return super().amount_out_array(asset_in, amounts_in)
+
     def prepare_internal_swap_txns(self, sender: str, asset_in: Asset, amount_in: int, amount_out: int, suggested_params: dict):
         _asset_in = self._assets[asset_in]
 
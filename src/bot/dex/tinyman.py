@@ -1,43 +1,67 @@
 from algosdk.v2client.algod import AlgodClient
 from algosdk.v2client.indexer import IndexerClient
 
+import numpy as np
 from tinyman.v2.client import TinymanV2MainnetClient
-from tinyman.exceptions import LowSwapAmountError
 
 from ..asset import Asset
 from ..pool import Pool
+from ..quote import tinyman_amount_out, tinyman_amount_out_array
+from ..state import StateQuery, decode_state
 from ..exceptions import PoolFetchError
 
 
 class TinymanPool(Pool):
 
-    def __init__(self, algod: AlgodClient, indexer: IndexerClient, assets: tuple[Asset, Asset]):
+    # The transfer in, and the application call paying for the transfer out.
+    swap_min_fees = 3
+    # `swap`, `fixed-input`, minimum amount out.
+    swap_min_out_arg = 2
+
+    def __init__(self, algod: AlgodClient, indexer: IndexerClient, assets: tuple[Asset, Asset], client: TinymanV2MainnetClient = None):
         super().__init__(algod, indexer, assets)
 
-        client = TinymanV2MainnetClient(algod)
-        self._assets = {asset: client.fetch_asset(asset.index) for asset in assets}
-        self._pool = client.fetch_pool(*self._assets.values())
+        self._client = client
+        self._load_sdk()
         self._address = self._pool.address
+        self._app_id = self._pool.validator_app_id
 
         self.refresh_state()
 
+    @classmethod
+    def create_client(cls, algod: AlgodClient) -> TinymanV2MainnetClient:
+        return TinymanV2MainnetClient(algod)
+
+    def _load_sdk(self):
+        client = self._client or self.create_client(self.algod)
+        self._sdk_assets = {asset: client.fetch_asset(asset.index) for asset in self.assets}
+        self._sdk_pool = client.fetch_pool(*self._sdk_assets.values())
+
     def refresh_state(self):
         self._pool.refresh()
+        self._set_state(self._pool.asset_1_reserves, self._pool.asset_2_reserves, self._pool.total_fee_share)
 
-        if not self._pool.asset_1_reserves or not self._pool.asset_2_reserves:
+    def state_query(self) -> StateQuery:
+        return StateQuery(self._app_id, self._address)
+
+    def load_state(self, key_values: list[dict]):
+        state = decode_state(key_values)
+        self._set_state(state.get('asset_1_reserves'), state.get('asset_2_reserves'), state.get('total_fee_share', self.fee_bps))
+
+    def _set_state(self, asset_1_reserves: int, asset_2_reserves: int, total_fee_share: int):
+        if not asset_1_reserves or not asset_2_reserves:
             raise PoolFetchError
-        reserves = (self._pool.asset_1_reserves, self._pool.asset_2_reserves)
+        reserves = (asset_1_reserves, asset_2_reserves)
         self._supply = {asset: supply for asset, supply in zip(sorted(self.assets, reverse=True), reserves)}
+        self.fee_bps = total_fee_share
 
     def amount_out(self, asset_in: Asset, amount_in: int) -> int:
-        _asset_in = self._assets[asset_in]
-        try:
-            quote = self._pool.fetch_fixed_input_swap_quote(_asset_in(amount_in), slippage=0, refresh=False)
-        except LowSwapAmountError:
-            return 0
-        amount_out = quote.amount_out.amount
+        asset_out = self.get_other_asset(asset_in)
+        return tinyman_amount_out(self._supply[asset_in], self._supply[asset_out], amount_in, self.fee_bps)
 
-        return amount_out
+    def amount_out_array(self, asset_in: Asset, amounts_in: np.ndarray) -> np.ndarray:
+        asset_out = self.get_other_asset(asset_in)
+        return tinyman_amount_out_array(self._supply[asset_in], self._supply[asset_out], amounts_in, self.fee_bps)
 
     def prepare_internal_swap_txns(self, sender: str, asset_in: Asset, amount_in: int, amount_out: int, suggested_params: dict):
         _asset_in = self._assets[asset_in]
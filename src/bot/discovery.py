@@ -0,0 +1,104 @@
+from typing import Dict, Iterable, List, Optional, Tuple, Type
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations, product
+import functools
+import threading
+import logging
+import json
+import time
+
+from algosdk.v2client.algod import AlgodClient
+from algosdk.v2client.indexer import IndexerClient
+
+from .asset import Asset
+from .pool import Pool
+from .dex.pactfi import PactfiPool
+from .dex.tinyman import TinymanPool
+from .dex.algofi import AlgofiPool
+from .exceptions import PoolFetchError
+
+DEFAULT_POOL_CLASSES = (TinymanPool, PactfiPool, AlgofiPool)
+DEFAULT_NEGATIVE_CACHE_FILE = 'no_pools.json'
+DEFAULT_NEGATIVE_TTL = 24 * 60 * 60
+DEFAULT_MAX_WORKERS = 16
+
+
+class PoolDiscovery:
+    """Probes DEXes for pools between pairs of assets.
+
+    Probes run concurrently and share one SDK client per DEX, whose asset
+    lookups are memoized. Pairs found to have no pool are remembered in a JSON
+    file for `ttl` seconds, so later discoveries only probe new or expired pairs.
+    """
+
+    def __init__(self,
+                 algod: AlgodClient,
+                 indexer: IndexerClient,
+                 classes: Iterable[Type[Pool]] = DEFAULT_POOL_CLASSES,
+                 cache_file: str = DEFAULT_NEGATIVE_CACHE_FILE,
+                 ttl: float = DEFAULT_NEGATIVE_TTL,
+                 max_workers: int = DEFAULT_MAX_WORKERS):
+        self.algod = algod
+        self.indexer = indexer
+        self.classes = list(classes)
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.max_workers = max_workers
+        self._clients = {}
+        self._lock = threading.Lock()
+        self._missing = self._load_missing()
+
+    def discover(self, assets: List[Asset], known: Iterable[Pool] = ()) -> List[Pool]:
+        """Returns the pools between `assets` that aren't in `known` nor known to be missing."""
+        known = {self._key(pool.__class__, pool.assets) for pool in known}
+        now = time.time()
+        probes = [
+            (cls, pair) for cls, pair in product(self.classes, combinations(assets, 2))
+            if self._key(cls, pair) not in known and self._missing.get(self._key(cls, pair), 0) <= now
+        ]
+        logging.info(f'Probing {len(probes)} pairs...')
+
+        with ThreadPoolExecutor(self.max_workers) as executor:
+            pools = list(executor.map(lambda probe: self._probe(*probe), probes))
+        self._save_missing()
+        return [pool for pool in pools if pool is not None]
+
+    def client(self, cls: Type[Pool]):
+        """The SDK client shared by every probe of `cls`."""
+        with self._lock:
+            if cls not in self._clients:
+                client = cls.create_client(self.algod)
+                client.fetch_asset = functools.lru_cache(maxsize=None)(client.fetch_asset)
+                self._clients[cls] = client
+            return self._clients[cls]
+
+    def _probe(self, cls: Type[Pool], assets: Tuple[Asset, Asset]) -> Optional[Pool]:
+        try:
+            pool = cls(self.algod, self.indexer, assets, client=self.client(cls))
+            if pool.supply(assets[0]) == 0 or pool.supply(assets[1]) == 0:
+                raise PoolFetchError
+            logging.info(f'Initialized {pool}.')
+            return pool
+        except PoolFetchError:
+            logging.info(f"Couldn't initiliaze {cls.__name__} with assets {'/'.join(str(asset) for asset in assets)}.")
+            with self._lock:
+                self._missing[self._key(cls, assets)] = time.time() + self.ttl
+        except Exception as e:
+            logging.warning(f'Failed probing {cls.__name__} with assets {"/".join(str(asset) for asset in assets)}: {e!r}')
+
+    @staticmethod
+    def _key(cls: Type[Pool], assets: Iterable[Asset]) -> str:
+        return ':'.join([cls.__name__] + [str(index) for index in sorted(asset.index for asset in assets)])
+
+    def _load_missing(self) -> Dict[str, float]:
+        try:
+            with open(self.cache_file) as fp:
+                missing = json.load(fp)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        now = time.time()
+        return {key: expires for key, expires in missing.items() if expires > now}
+
+    def _save_missing(self) -> None:
+        with open(self.cache_file, 'w') as fp:
+            json.dump(self._missing, fp)
@@ -7,3 +7,5 @@ class ArbitrageOperationError(Exception): ...
 class PoolValueError(ValueError): ...
 class LowAmountInError(ValueError): ...
 class PoolFetchError(Exception): ...
+class StaleRoundError(Exception): ...
+class SnapshotError(Exception): ...
@@ -0,0 +1,61 @@
+from typing import List, Optional, Tuple
+import copy
+
+import numpy as np
+from algosdk import transaction
+
+from .pool import BasePool
+from .cycles import CycleIndex
+
+DEFAULT_PARAMS_MAX_AGE = 20
+DEFAULT_VALIDITY = 1000
+
+
+class SuggestedParamsCache:
+    """Suggested params fetched once every `max_age` rounds.
+
+    In between, `at` moves the validity window of the cached params to the
+    current round, since that's the only field that changes from round to
+    round; the fees only change under congestion.
+    """
+
+    def __init__(self, max_age: int = DEFAULT_PARAMS_MAX_AGE, validity: int = DEFAULT_VALIDITY):
+        self.max_age = max_age
+        self.validity = validity
+        self.params: Optional[transaction.SuggestedParams] = None
+
+    def is_stale(self, round: Optional[int]) -> bool:
+        return self.params is None or round is None or not 0 <= round - self.params.first < self.max_age
+
+    def update(self, params: transaction.SuggestedParams) -> None:
+        self.params = params
+
+    def at(self, round: Optional[int]) -> transaction.SuggestedParams:
+        params = copy.copy(self.params)
+        if round is not None:
+            params.first = round
+            params.last = round + self.validity
+        return params
+
+
+class FeeTable:
+    """Swap fee of every pool in microalgos, recomputed only when the fee parameters change."""
+
+    def __init__(self, pools: List[BasePool]):
+        self.pools = pools
+        self.fees = np.zeros(len(pools), dtype=np.int64)
+        self._key: Tuple = None
+
+    def update(self, suggested_params: transaction.SuggestedParams) -> bool:
+        """Recomputes the fees if needed, returning whether they changed."""
+        key = (suggested_params.fee, suggested_params.flat_fee, suggested_params.min_fee)
+        if key == self._key:
+            return False
+        self._key = key
+        self.fees = np.array([pool.fee(suggested_params) for pool in self.pools], dtype=np.int64)
+        return True
+
+    def cycle_fees(self, index: CycleIndex, cycle_ids: np.ndarray) -> np.ndarray:
+        """Total fee of the cycles `cycle_ids` of `index`, whose pools must be `pools`."""
+        hops = index.hops[cycle_ids]
+        return np.where(hops >= 0, self.fees[hops], 0).sum(axis=1)
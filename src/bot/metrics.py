@@ -0,0 +1,142 @@
+"""Latency histograms and counters of the bot loop, in the Prometheus text format.
+
+Metrics are identified by a name and labels; `METRICS.span(name, **labels)`
+times a block of code. The current values can be served over HTTP with
+`serve` or written to a file with `write_periodically`.
+"""
+from typing import Dict, Iterable, Tuple
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_WRITE_INTERVAL = 10.0
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative bucket counts of observed values, like a Prometheus histogram."""
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> Iterable[Tuple[str, int]]:
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            yield ('+Inf' if bound == float('inf') else repr(bound)), total
+
+
+class Metrics:
+
+    def __init__(self, prefix: str = 'bot'):
+        self.prefix = prefix
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        with self._lock:
+            histograms = self.histograms.setdefault(name, {})
+            key = _labels(labels)
+            if key not in histograms:
+                histograms[key] = Histogram()
+            histograms[key].observe(seconds)
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        with self._lock:
+            counters = self.counters.setdefault(name, {})
+            key = _labels(labels)
+            counters[key] = counters.get(key, 0) + amount
+
+    @contextmanager
+    def span(self, name: str, **labels):
+        """Observes the duration of the block in the `<name>_seconds` histogram."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(f'{name}_seconds', time.perf_counter() - start, **labels)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, histograms in sorted(self.histograms.items()):
+                name = f'{self.prefix}_{name}'
+                lines.append(f'# TYPE {name} histogram')
+                for labels, histogram in sorted(histograms.items()):
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{name}_bucket{_format(labels + (("le", bound),))} {count}')
+                    lines.append(f'{name}_sum{_format(labels)} {histogram.sum}')
+                    lines.append(f'{name}_count{_format(labels)} {histogram.count}')
+            for name, counters in sorted(self.counters.items()):
+                name = f'{self.prefix}_{name}_total'
+                lines.append(f'# TYPE {name} counter')
+                for labels, value in sorted(counters.items()):
+                    lines.append(f'{name}{_format(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """Serves `render` at every path of `host:port` from a daemon thread."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def write(self, filename: str) -> None:
+        """Writes `render` to `filename` atomically, for node exporter's textfile collector and the like."""
+        with open(filename + '.tmp', 'w') as fp:
+            fp.write(self.render())
+        os.replace(filename + '.tmp', filename)
+
+    def write_periodically(self, filename: str, interval: float = DEFAULT_WRITE_INTERVAL) -> threading.Thread:
+        def loop():
+            while True:
+                time.sleep(interval)
+                self.write(filename)
+
+        thread = threading.Thread(target=loop, daemon=True)
+        thread.start()
+        return thread
+
+
+def _labels(labels: dict) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format(labels: Labels) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+METRICS = Metrics()
@@ -0,0 +1,47 @@
+from typing import List
+
+import numpy as np
+
+from .asset import Asset, ALGO
+from .pool import BasePool
+from .screening import ReserveBook
+
+
+class Numeraire:
+    """Prices of the base assets of a search in a common asset.
+
+    Cycles rooted at different assets are compared, and their fees subtracted,
+    in units of `asset`, which defaults to ALGO since fees are paid in it. The
+    price of a base asset is the mid price of its deepest pool with `asset`,
+    read from a `ReserveBook` over `pools` on every `update`.
+    """
+
+    def __init__(self, pools: List[BasePool], bases: List[Asset], asset: Asset = ALGO):
+        self.asset = asset
+        self.bases = list(bases)
+        self.prices = np.ones(len(self.bases))
+        self._pool_ids = []
+        self._sides = []
+        for base in self.bases:
+            pool_ids = [i for i, pool in enumerate(pools) if base in pool.assets and asset in pool.assets]
+            if base != asset and not pool_ids:
+                raise ValueError(f'{base} has no pool with {asset} to be priced in.')
+            self._pool_ids.append(np.array(pool_ids if base != asset else [], dtype=np.int64))
+            self._sides.append(np.array([pools[i].assets.index(base) for i in pool_ids], dtype=np.int64))
+
+    def update(self, book: ReserveBook) -> np.ndarray:
+        """Reads the prices from `book`, returning the ids in `bases` of the ones that changed."""
+        previous = self.prices.copy()
+        for j, (pool_ids, sides) in enumerate(zip(self._pool_ids, self._sides)):
+            if not len(pool_ids):
+                continue
+            reserves = book.reserves[pool_ids]
+            rows = np.arange(len(pool_ids))
+            base_reserves, quote_reserves = reserves[rows, sides], reserves[rows, 1 - sides]
+            deepest = np.argmax(quote_reserves)
+            self.prices[j] = quote_reserves[deepest] / base_reserves[deepest]
+        return np.flatnonzero(self.prices != previous)
+
+    def price(self, base: Asset) -> float:
+        """Units of `asset` per unit of `base`."""
+        return float(self.prices[self.bases.index(base)])
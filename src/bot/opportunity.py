@@ -0,0 +1,54 @@
+from typing import List, Tuple
+import heapq
+
+import numpy as np
+
+DEFAULT_COMPACT_FACTOR = 4
+
+
+class OpportunityQueue:
+    """Persistent priority queue of cycles keyed by estimated profit.
+
+    Rescoring a cycle pushes a new entry and leaves the old one in the heap;
+    stale entries are recognized by their version and skipped, and the heap is
+    rebuilt once they outnumber the live ones by `compact_factor`.
+    """
+
+    def __init__(self, size: int, compact_factor: int = DEFAULT_COMPACT_FACTOR):
+        self.profits = np.zeros(size)
+        self.versions = np.zeros(size, dtype=np.int64)
+        self.compact_factor = compact_factor
+        self._heap: List[Tuple[float, int, int]] = []
+
+    def __len__(self):
+        return int(np.count_nonzero(self.profits > 0))
+
+    def update(self, cycle_ids: np.ndarray, profits: np.ndarray) -> None:
+        """Rescores `cycle_ids`; cycles without a positive profit leave the queue."""
+        self.profits[cycle_ids] = profits
+        self.versions[cycle_ids] += 1
+        for i, profit, version in zip(cycle_ids.tolist(), profits.tolist(), self.versions[cycle_ids].tolist()):
+            if profit > 0:
+                heapq.heappush(self._heap, (-profit, version, i))
+
+        if len(self._heap) > self.compact_factor * max(len(self), 1):
+            self._compact()
+
+    def top(self, k: int) -> List[Tuple[int, float]]:
+        """The `k` most profitable cycles as `(cycle_id, profit)`, best first, without removing them."""
+        best = []
+        while self._heap and len(best) < k:
+            entry = heapq.heappop(self._heap)
+            if self._is_live(entry):
+                best.append(entry)
+        for entry in best:
+            heapq.heappush(self._heap, entry)
+        return [(i, -profit) for profit, _, i in best]
+
+    def _is_live(self, entry: Tuple[float, int, int]) -> bool:
+        _, version, i = entry
+        return version == self.versions[i]
+
+    def _compact(self) -> None:
+        self._heap = [entry for entry in self._heap if self._is_live(entry)]
+        heapq.heapify(self._heap)
@@ -0,0 +1,88 @@
+"""The search and sizing stages of a round, shared by `BotClient.run` and
+`bot.replay`, so replays take the same decisions as the bot.
+
+Every round, the pools are refreshed by the caller and read with `refresh`;
+`search` then returns the best opportunities and `plan` sizes them. What
+happens to the plans, sending or recording them, is up to the caller.
+"""
+from typing import Callable, Dict, Iterable, List, Optional
+import logging
+
+import numpy as np
+from algosdk import transaction
+
+from .asset import Asset
+from .arbitrage import ArbitrageGraph
+from .cycles import CycleIndex
+from .numeraire import Numeraire
+from .screening import ReserveBook
+from .workers import ScoringWorkers
+from .search import CycleSearch, NegativeCycleSearch, Opportunity, ENUMERATE, BELLMAN_FORD, SEARCHES
+from .fees import FeeTable
+from .planner import Plan, SubmissionPlanner
+from .metrics import METRICS
+
+
+class RoundPipeline:
+    """Searches the cycles of `graph` through `base_assets` and sizes the best `top_k`.
+
+    With the `ENUMERATE` search, the cycles of up to `cutoff` hops are
+    compiled with `compile`, by default `ArbitrageGraph.compile_bases`, and
+    scored in `workers` processes if given; with `BELLMAN_FORD`, they are
+    detected every round instead, see `bot.search`.
+
+    The pools and base prices that changed are kept until a search
+    completes, so rounds aborted in between don't lose them.
+    """
+
+    def __init__(self,
+                 graph: ArbitrageGraph,
+                 base_assets: Iterable[Asset],
+                 cutoff: int,
+                 max_amount_in: int,
+                 search: str,
+                 top_k: int,
+                 workers: int = 0,
+                 compile: Callable[[List[Asset], int], CycleIndex] = None):
+        base_assets = list(base_assets)
+        pools = graph.pools
+        self.max_amount_in = max_amount_in
+        self.book = ReserveBook(pools)
+        self.numeraire = Numeraire(pools, base_assets)
+        self.fee_table = FeeTable(pools)
+        self.workers = None
+        if search == BELLMAN_FORD:
+            self.searcher = NegativeCycleSearch(graph, base_assets, self.fee_table, top_k)
+        elif search == ENUMERATE:
+            index = (compile or graph.compile_bases)(base_assets, cutoff)
+            if workers:
+                self.workers = ScoringWorkers(index, workers)
+            self.searcher = CycleSearch(index, self.fee_table, self.numeraire, top_k, self.workers)
+        else:
+            raise ValueError(f'`search` must be one of {SEARCHES}.')
+        self.planner = SubmissionPlanner(max_amount_in, self.numeraire)
+        self.dirty = np.arange(0)
+        self.repriced = np.arange(0)
+
+    def refresh(self, suggested_params: transaction.SuggestedParams) -> None:
+        """Reads the state of the pools, once they are refreshed, and the fees of `suggested_params`."""
+        self.dirty = np.union1d(self.dirty, self.book.update())
+        self.repriced = np.union1d(self.repriced, self.numeraire.update(self.book))
+        if self.fee_table.update(suggested_params):
+            self.dirty = np.arange(len(self.book.pools))
+
+    def search(self) -> List[Opportunity]:
+        logging.info('Finding possible opportunities...')
+        opportunities = self.searcher.search(self.book, self.dirty, self.max_amount_in, self.repriced)
+        logging.info(f'{len(self.searcher)} opportunities found, {len(self.dirty)} pools changed.')
+        self.dirty = np.arange(0)
+        self.repriced = np.arange(0)
+        return opportunities
+
+    def plan(self, opportunities: List[Opportunity], budgets: Optional[Dict[Asset, int]] = None) -> List[Plan]:
+        with METRICS.span('sizing'):
+            return self.planner.plan(opportunities, budgets)
+
+    def close(self) -> None:
+        if self.workers is not None:
+            self.workers.close()
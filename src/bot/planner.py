@@ -0,0 +1,63 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from dataclasses import dataclass
+
+from .asset import Asset, ALGO
+from .arbitrage import ArbitragePath, DEFAULT_MIN_AMOUNT_IN
+from .numeraire import Numeraire
+
+
+@dataclass
+class Plan:
+    path: ArbitragePath
+    amount_in: int
+    profit: int
+
+
+class SubmissionPlanner:
+    """Picks the opportunities to submit together in a round.
+
+    Opportunities are taken best first, skipping the ones sharing a pool with
+    an opportunity already taken, since those were sized against reserves the
+    earlier swap will move. Their amounts in must also fit in the budget of
+    their asset, and their fees in the budget of ALGO if there is one, as
+    every group is sent at once.
+
+    With a `numeraire`, `max_amount_in`, the fees and the profits of the plans
+    are in its asset and the amounts in are converted at its prices.
+    """
+
+    def __init__(self, max_amount_in: int, numeraire: Numeraire = None):
+        self.max_amount_in = max_amount_in
+        self.numeraire = numeraire
+
+    def plan(self, opportunities: Iterable[Tuple[ArbitragePath, int]], budgets: Optional[Dict[Asset, int]] = None) -> List[Plan]:
+        """Plans `(path, fee)` opportunities, best first, spending at most `budgets[path.asset]`, and the fees out of `budgets[ALGO]`, if given."""
+        plans = []
+        used = set()
+        budgets = None if budgets is None else dict(budgets)
+        for path, fee in opportunities:
+            pools = {edge.pool for edge in path.edges}
+            if pools & used:
+                continue
+            price = 1.0 if self.numeraire is None else self.numeraire.price(path.asset)
+            max_amount_in = int(self.max_amount_in / price)
+            if budgets is not None:
+                if budgets.get(ALGO, fee) < fee:
+                    continue
+                # Fees are paid in ALGO, out of the same balance as ALGO amounts in.
+                max_amount_in = min(max_amount_in, budgets.get(path.asset, 0) - (fee if path.asset == ALGO else 0))
+            if max_amount_in < DEFAULT_MIN_AMOUNT_IN:
+                continue
+            amount_in = path.optimal_amount_in_analytic(max_amount_in)
+            if not amount_in:
+                continue
+            profit = int(path.profit(amount_in) * price) - fee
+            if profit <= 0:
+                continue
+            plans.append(Plan(path, amount_in, profit))
+            used |= pools
+            if budgets is not None:
+                budgets[path.asset] -= amount_in
+                if ALGO in budgets:
+                    budgets[ALGO] -= fee
+        return plans
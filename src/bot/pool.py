@@ -1,7 +1,8 @@
-from typing import Iterable
+from typing import Callable, Iterable, List, Optional, Tuple
 from abc import ABC, abstractmethod
 from itertools import chain
 
+import numpy as np
 from algosdk.v2client.algod import AlgodClient
 from algosdk.v2client.indexer import IndexerClient
 from algosdk.atomic_transaction_composer import TransactionWithSigner
@@ -9,6 +10,10 @@ from algosdk.atomic_transaction_composer import TransactionWithSigner
 from .asset import Asset, ALGO
 from .account import Account
 from .transaction import AtomicTransaction
+from .templates import SwapTemplate
+from .quote import BPS, DEFAULT_QUOTE_CACHE_SIZE, QuoteCache
+from .state import StateQuery
+from .metrics import METRICS
 from .exceptions import TransactionError, PoolTransactionError
 
 
@@ -52,6 +57,14 @@ class BasePool(ABC):
         """Calculates the exact amount of received tokens on the operation."""
         pass
 
+    def quote(self, asset_in: Asset, amount_in: int) -> int:
+        """`amount_out`, memoized by pools that keep a quote cache."""
+        return self.amount_out(asset_in, amount_in)
+
+    def amount_out_array(self, asset_in: Asset, amounts_in: np.ndarray) -> np.ndarray:
+        """Calculates `amount_out` for an array of input amounts."""
+        return np.array([self.quote(asset_in, int(amount_in)) for amount_in in amounts_in], dtype=np.int64)
+
     @abstractmethod
     def prepare_internal_swap_txns(self, sender: str, asset_in: Asset, amount_in: int, amount_out: int, suggested_params):
         """Returns a list of the internal swap transactions."""
@@ -62,6 +75,14 @@ class BasePool(ABC):
         """Refreshs the state of the pool."""
         pass
 
+    def state_query(self) -> Optional[StateQuery]:
+        """The application state holding the pool's reserves, if it can be read directly."""
+        return None
+
+    def load_state(self, key_values: List[dict]) -> None:
+        """Refreshs the state of the pool from the raw result of `state_query`."""
+        raise NotImplementedError
+
     @abstractmethod
     def fee(self, suggested_params: dict):
         """Swap transaction fee value in ALGO."""
@@ -77,17 +98,83 @@ class BasePool(ABC):
 
 class XYKPoolMixin:
 
+    fee_bps: int
+
+    def mobius(self: BasePool, asset_in: Asset) -> Tuple[float, float, float]:
+        """Coefficients `(a, b, c)` of the swap as a Möbius function ``a x / (b + c x)``.
+
+        The default charges the fee on the amount in, ``gamma x R_out / (R_in + gamma x)``.
+        """
+        gamma = 1 - self.fee_bps / BPS
+        return gamma * self.supply(self.get_other_asset(asset_in)), self.supply(asset_in), gamma
+
     def amount_out_approx(self: BasePool, asset_in: Asset, amount_in: float) -> float:
         if amount_in < 0:
             raise ValueError
-        asset_out = self.get_other_asset(asset_in)
-        gamma = 1 - self.fee
-        amount_out = amount_in * gamma * self.supply(asset_out) / (gamma * amount_in + self.supply(asset_in))
-        return amount_out
+        a, b, c = self.mobius(asset_in)
+        return a * amount_in / (b + c * amount_in)
 
 
 class Pool(XYKPoolMixin, BasePool):
 
+    # Transactions a swap pays the minimum fee for, inner ones included, if known without the SDK.
+    swap_min_fees: Optional[int] = None
+    # Index of the minimum amount out in the arguments of the swap application call.
+    swap_min_out_arg: Optional[int] = None
+    # Whether the pool is quoted as ``x y = k``, as opposed to stableswap pools.
+    is_constant_product: bool = True
+
+    # Quotes kept per pool, for the current reserves only.
+    quote_cache_size: int = DEFAULT_QUOTE_CACHE_SIZE
+
+    _client = None
+    _sdk_pool = None
+    _sdk_assets = None
+    _quote_cache = None
+    # Bumped whenever the reserves or the fee change, invalidating the quotes.
+    reserve_version = 0
+
+    @property
+    def _supply(self) -> dict:
+        return self._current_supply
+
+    @_supply.setter
+    def _supply(self, supply: dict):
+        if supply != getattr(self, '_current_supply', None):
+            self._state_changed()
+        self._current_supply = supply
+
+    @property
+    def fee_bps(self) -> int:
+        return self._fee_bps
+
+    @fee_bps.setter
+    def fee_bps(self, fee_bps: int):
+        if fee_bps != getattr(self, '_fee_bps', None):
+            self._state_changed()
+        self._fee_bps = fee_bps
+
+    def _state_changed(self):
+        """Invalidates the quotes, for pools whose quotes depend on more than their reserves and fee."""
+        self.reserve_version += 1
+        if self._quote_cache is not None:
+            self._quote_cache.clear()
+
+    @property
+    def quote_cache(self) -> QuoteCache:
+        if self._quote_cache is None:
+            self._quote_cache = QuoteCache(self.quote_cache_size)
+        return self._quote_cache
+
+    def quote(self, asset_in: Asset, amount_in: int) -> int:
+        """`amount_out` of the current reserves, memoized in `quote_cache`."""
+        key = (self.reserve_version, asset_in.index, int(amount_in))
+        amount_out = self.quote_cache.get(key)
+        if amount_out is None:
+            amount_out = self.amount_out(asset_in, amount_in)
+            self.quote_cache.put(key, amount_out)
+        return amount_out
+
     @property
     def address(self) -> str:
         try:
@@ -95,13 +182,79 @@ class Pool(XYKPoolMixin, BasePool):
         except AttributeError:
             raise AttributeError(f'{self.__class__.__name__} object has no `_address` attribute.')
 
+    @property
+    def _pool(self):
+        """The DEX SDK pool object, only fetched when first needed."""
+        if self._sdk_pool is None:
+            self._load_sdk()
+        return self._sdk_pool
+
+    @property
+    def _assets(self) -> dict:
+        """The DEX SDK asset objects, by `Asset`."""
+        if self._sdk_assets is None:
+            self._load_sdk()
+        return self._sdk_assets
+
+    @classmethod
+    def create_client(cls, algod: AlgodClient):
+        """Creates the DEX SDK client, which can be shared between pools through the `client` argument."""
+        raise NotImplementedError
+
+    def _load_sdk(self):
+        """Fetches the SDK objects backing `_pool` and `_assets`."""
+        raise NotImplementedError
+
+    def to_snapshot(self) -> dict:
+        """SDK-independent description of the pool, see `bot.snapshot`."""
+        return {
+            'class': self.__class__.__name__,
+            'address': self.address,
+            'app_id': self._app_id,
+            'assets': [asset.index for asset in self.assets],
+            'fee_bps': self.fee_bps,
+            'reserves': [self.supply(asset) for asset in self.assets],
+        }
+
+    @classmethod
+    def from_snapshot(cls, algod: AlgodClient, indexer: IndexerClient, record: dict, assets: dict) -> 'Pool':
+        """Restores a pool from `to_snapshot` without any network call; `assets` maps indexes to `Asset`."""
+        pool = cls.__new__(cls)
+        BasePool.__init__(pool, algod, indexer, tuple(assets[index] for index in record['assets']))
+        pool._address = record['address']
+        pool._app_id = record['app_id']
+        pool.restore_state(record['reserves'], record['fee_bps'])
+        return pool
+
+    def restore_state(self, reserves: Iterable[int], fee_bps: int) -> None:
+        """Sets the reserves of `assets`, in order, and the fee, as recorded by `to_snapshot` or `bot.replay`."""
+        self._supply = dict(zip(self.assets, (int(reserve) for reserve in reserves)))
+        self.fee_bps = int(fee_bps)
+
     def supply(self, asset: Asset) -> int:
         try:
             return self._supply[asset]
         except AttributeError:
             raise AttributeError(f'{self.__class__.__name__} object has no `_supply` attribute.')
 
+    def swap_template(self, sender: str, asset_in: Asset, suggested_params) -> Optional[SwapTemplate]:
+        """Swap transactions of `sender` to be filled in with the amounts, see `bot.templates`.
+
+        Only constant product swaps have fees independent of the amounts: the
+        application calls of stableswaps pay for as many invariant iterations
+        as the amounts need, and may come with extra budget calls.
+        """
+        if self.swap_min_out_arg is None or not self.is_constant_product:
+            return None
+        txns = self.prepare_internal_swap_txns(sender, asset_in, 10_000, 1, suggested_params)
+        if any(txn.sender != sender for txn in txns):
+            return None
+        return SwapTemplate.from_txns(txns, self.swap_min_out_arg)
+
     def fee(self, suggested_params: dict):
+        # Without congestion every transaction pays the minimum fee, so there's no need to build them.
+        if self.swap_min_fees is not None and not suggested_params.flat_fee and not suggested_params.fee:
+            return self.swap_min_fees * suggested_params.min_fee
         txns = self.prepare_internal_swap_txns("", self.assets[0], 10_000, 1, suggested_params)
         return sum(txn.fee for txn in txns)
 
@@ -156,9 +309,46 @@ class ArbitrageAtomicTransaction(AtomicTransaction):
     def profit(self) -> int:
         return self.amount_out - self.amount_in
 
-    def profit_after_fee(self, suggested_params: dict) -> int:
-        assert self.asset == ALGO
-        return self.profit - self.fee(suggested_params)
+    def profit_after_fee(self, suggested_params: dict, price: float = None) -> int:
+        """Profit in ALGO net of fees, converting the profit at `price` ALGO per unit of `asset`."""
+        return profit_in_algo(self.asset, self.profit, price) - self.fee(suggested_params)
 
     def fee(self, suggested_params: dict) -> int:
         return sum(swap_txn.pool.fee(suggested_params) for swap_txn in self.swap_txns)
+
+
+def publish_quote_cache_counts(pools: Iterable[BasePool]) -> None:
+    """Adds the quote cache hits and misses of `pools` since the last call to the metrics, by DEX."""
+    for pool in pools:
+        if getattr(pool, '_quote_cache', None) is None:
+            continue
+        hits, misses = pool._quote_cache.take_counts()
+        METRICS.inc('quote_cache_hits', hits, dex=pool.__class__.__name__)
+        METRICS.inc('quote_cache_misses', misses, dex=pool.__class__.__name__)
+
+
+def profit_in_algo(asset: Asset, profit: int, price: float = None) -> int:
+    """Converts a `profit` in `asset` into ALGO at `price`, which is required unless `asset` is ALGO."""
+    if asset == ALGO:
+        return profit
+    if price is None:
+        raise ValueError(f'A price in ALGO is required for profits in {asset}.')
+    return int(profit * price)
+
+
+def fit_mobius(amount_out: Callable[[int], int], reserve_in: int, rate: float = None) -> Tuple[float, float, float]:
+    """Coefficients `(a, b, 1)` of the Möbius function closest to a swap curve other than constant product.
+
+    It has the marginal `rate` of the curve and the same `amount_out` for 1%
+    of `reserve_in`. Without `rate`, the quote of 0.01% of `reserve_in` gives it.
+    """
+    if rate is None:
+        small = max(reserve_in // 10_000, 1)
+        rate = amount_out(small) / small
+    probe = max(reserve_in // 100, 1)
+    probe_out = amount_out(probe)
+    if not probe_out or rate * probe <= probe_out:
+        # Flat at this scale: as good as linear.
+        return rate * 1e18, 1e18, 1.0
+    b = probe * probe_out / (rate * probe - probe_out)
+    return rate * b, b, 1.0
@@ -0,0 +1,107 @@
+from typing import Dict, List, Tuple
+from contextlib import contextmanager
+import logging
+import os
+import time
+
+from pyinstrument import Profiler
+from pyinstrument.frame import Frame
+
+DEFAULT_PROFILE_DIR = 'profiles'
+DEFAULT_PROFILE_EVERY = 100
+DEFAULT_PROFILE_KEEP = 20
+DEFAULT_PROFILE_INTERVAL = 0.001
+DEFAULT_SUMMARY_SIZE = 20
+
+FunctionKey = Tuple[str, str, int]
+
+
+class TickProfiler:
+    """Samples ticks of the bot loop with pyinstrument.
+
+    Every `every`-th tick is profiled, and so is every tick if `threshold` is
+    given, keeping only those slower than `threshold` seconds. Kept call trees
+    are written to `directory` as HTML, deleting all but the latest `keep`.
+    The self time of every function across the profiled ticks is summarized
+    in `directory/summary.txt`.
+
+    Only the thread calling `tick` is sampled, so work on the event loop
+    thread shows up as time spent waiting on it.
+    """
+
+    def __init__(self,
+                 directory: str = DEFAULT_PROFILE_DIR,
+                 every: int = DEFAULT_PROFILE_EVERY,
+                 threshold: float = None,
+                 keep: int = DEFAULT_PROFILE_KEEP,
+                 interval: float = DEFAULT_PROFILE_INTERVAL):
+        self.directory = directory
+        self.every = every
+        self.threshold = threshold
+        self.keep = keep
+        self.interval = interval
+        self.ticks = 0
+        self.profiled = 0
+        self.self_times: Dict[FunctionKey, float] = {}
+        os.makedirs(directory, exist_ok=True)
+        # Profiles of earlier runs count towards `keep` too.
+        self._files: List[str] = sorted(
+            (os.path.join(directory, file) for file in os.listdir(directory) if file.startswith('tick-')),
+            key=os.path.getmtime
+        )
+
+    @contextmanager
+    def tick(self, name: str):
+        self.ticks += 1
+        sampled = bool(self.every) and self.ticks % self.every == 0
+        if not sampled and self.threshold is None:
+            yield
+            return
+
+        profiler = Profiler(interval=self.interval)
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            duration = time.perf_counter() - start
+            if sampled or duration > self.threshold:
+                self._save(profiler, name, duration)
+
+    def top(self, n: int = DEFAULT_SUMMARY_SIZE) -> List[Tuple[FunctionKey, float]]:
+        """The `n` functions with the most self time across the profiled ticks."""
+        return sorted(self.self_times.items(), key=lambda item: item[1], reverse=True)[:n]
+
+    def _save(self, profiler: Profiler, name: str, duration: float) -> None:
+        self.profiled += 1
+        root = profiler.last_session.root_frame()
+        if root is not None:
+            self._accumulate(root)
+
+        filename = os.path.join(self.directory, f'tick-{name}.html')
+        with open(filename, 'w') as fp:
+            fp.write(profiler.output_html())
+        self._files.append(filename)
+        while len(self._files) > self.keep:
+            os.remove(self._files.pop(0))
+
+        with open(os.path.join(self.directory, 'summary.txt'), 'w') as fp:
+            fp.write(self.summary())
+        logging.info(f'Profiled tick {name} ({duration:.3f}s) to `{filename}`.')
+
+    def _accumulate(self, frame: Frame) -> None:
+        stack = [frame]
+        while stack:
+            frame = stack.pop()
+            if not frame.is_synthetic:
+                key = (frame.function, frame.file_path_short, frame.line_no)
+                self.self_times[key] = self.self_times.get(key, 0.0) + frame.total_self_time
+            stack.extend(frame.children)
+
+    def summary(self, n: int = DEFAULT_SUMMARY_SIZE) -> str:
+        total = sum(self.self_times.values()) or 1.0
+        lines = [f'Top self time over {self.profiled} profiled ticks of {self.ticks}:']
+        for (function, path, line), seconds in self.top(n):
+            lines.append(f'{seconds:10.3f}s {100 * seconds / total:5.1f}%  {function}  {path}:{line}')
+        return '\n'.join(lines) + '\n'
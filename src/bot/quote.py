@@ -0,0 +1,122 @@
+from typing import Hashable, Optional, Union
+from collections import OrderedDict
+
+import numpy as np
+
+BPS = 10_000
+INT64_MAX = np.iinfo(np.int64).max
+
+DEFAULT_QUOTE_CACHE_SIZE = 4096
+
+IntArray = Union[np.ndarray, list]
+
+
+def tinyman_amount_out(reserve_in: int, reserve_out: int, amount_in: int, fee_bps: int) -> int:
+    """Fixed input swap quote of a Tinyman V2 pool.
+
+    The fee is taken from the input and the output supply after the swap is
+    rounded up, which is the same as ``reserve_out - k // (reserve_in + swap) - 1``.
+    Amounts too low to receive anything (Tinyman's ``LowSwapAmountError``) quote 0.
+    """
+    # Python ints, since NumPy scalars would overflow on the products.
+    amount_in = int(amount_in)
+    swap_amount = amount_in - amount_in * fee_bps // BPS
+    amount_out = _ceil_div(reserve_out * swap_amount, reserve_in + swap_amount) - 1
+    return max(amount_out, 0)
+
+
+def pactfi_amount_out(reserve_in: int, reserve_out: int, amount_in: int, fee_bps: int) -> int:
+    """Swap quote of a Pact constant product pool, where the fee is taken from the output."""
+    amount_in = int(amount_in)
+    gross_amount_out = reserve_out * amount_in // (reserve_in + amount_in)
+    return gross_amount_out * (BPS - fee_bps) // BPS
+
+
+def algofi_amount_out(reserve_in: int, reserve_out: int, amount_in: int, fee_bps: int) -> int:
+    """Swap quote of an Algofi constant product pool, where the fee is taken from the input, rounded up."""
+    amount_in = int(amount_in)
+    swap_amount = amount_in - _ceil_div(amount_in * fee_bps, BPS)
+    return reserve_out * swap_amount // (reserve_in + swap_amount)
+
+
+def tinyman_amount_out_array(reserve_in: int, reserve_out: int, amounts_in: IntArray, fee_bps: int) -> np.ndarray:
+    """Vectorized version of `tinyman_amount_out`."""
+    peak = _peak(amounts_in)
+    amounts_in = _int_array(amounts_in, (reserve_out + 1) * peak + reserve_in)
+    swap_amounts = amounts_in - amounts_in * fee_bps // BPS
+    amounts_out = _ceil_div(reserve_out * swap_amounts, reserve_in + swap_amounts) - 1
+    return np.maximum(amounts_out, 0).astype(np.int64)
+
+
+def pactfi_amount_out_array(reserve_in: int, reserve_out: int, amounts_in: IntArray, fee_bps: int) -> np.ndarray:
+    """Vectorized version of `pactfi_amount_out`."""
+    peak = _peak(amounts_in)
+    amounts_in = _int_array(amounts_in, max((reserve_out + 1) * peak + reserve_in, reserve_out * BPS))
+    gross_amounts_out = reserve_out * amounts_in // (reserve_in + amounts_in)
+    return (gross_amounts_out * (BPS - fee_bps) // BPS).astype(np.int64)
+
+
+def algofi_amount_out_array(reserve_in: int, reserve_out: int, amounts_in: IntArray, fee_bps: int) -> np.ndarray:
+    """Vectorized version of `algofi_amount_out`."""
+    peak = _peak(amounts_in)
+    amounts_in = _int_array(amounts_in, max((reserve_out + 1) * peak + reserve_in, peak * BPS))
+    swap_amounts = amounts_in - _ceil_div(amounts_in * fee_bps, BPS)
+    return (reserve_out * swap_amounts // (reserve_in + swap_amounts)).astype(np.int64)
+
+
+def _ceil_div(a, b):
+    return -(-a // b)
+
+
+def _peak(amounts: IntArray) -> int:
+    amounts = np.asarray(amounts)
+    return int(amounts.max()) if amounts.size else 0
+
+
+def _int_array(amounts: IntArray, bound: int) -> np.ndarray:
+    """Casts `amounts` to int64, falling back to exact Python integers when
+    the largest intermediate value `bound` would overflow."""
+    if bound > INT64_MAX:
+        return np.asarray(amounts).astype(object)
+    return np.asarray(amounts).astype(np.int64)
+
+
+class QuoteCache:
+    """Least recently used quotes of a pool, at most `maxsize` of them.
+
+    Keys include the reserve version of the pool, so quotes of older reserves
+    are never returned; `clear` frees them. `hits` and `misses` count lookups
+    until taken with `take_counts`.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_QUOTE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._quotes = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[int]:
+        quote = self._quotes.get(key)
+        if quote is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._quotes.move_to_end(key)
+        return quote
+
+    def put(self, key: Hashable, quote: int) -> None:
+        self._quotes[key] = quote
+        if len(self._quotes) > self.maxsize:
+            self._quotes.popitem(last=False)
+
+    def clear(self) -> None:
+        self._quotes.clear()
+
+    def take_counts(self) -> tuple[int, int]:
+        """Hits and misses since the last call."""
+        counts = self.hits, self.misses
+        self.hits = self.misses = 0
+        return counts
+
+    def __len__(self):
+        return len(self._quotes)
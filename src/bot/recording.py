@@ -0,0 +1,117 @@
+"""Per-round reserves of the tracked pools, stored column by column.
+
+A recording is a directory holding ``snapshot.json``, the `bot.snapshot`
+document of the pools, and compressed `.npz` chunks of consecutive rounds,
+each holding
+
+- ``rounds``: the recorded rounds, shape ``(R,)``,
+- ``reserves``: ``reserves[t, i, k]`` is the supply of ``pools[i].assets[k]`` at ``rounds[t]``, shape ``(R, P, 2)``,
+- ``fee_bps``: the pool fees at every round, shape ``(R, P)``.
+"""
+from typing import List
+from dataclasses import dataclass
+import glob
+import json
+import logging
+import os
+
+import numpy as np
+from algosdk.v2client.algod import AlgodClient
+from algosdk.v2client.indexer import IndexerClient
+
+from .pool import Pool
+from .screening import ReserveBook
+from .snapshot import encode_snapshot, decode_snapshot
+
+DEFAULT_RECORDING_FILE = 'recording'
+SNAPSHOT_FILE = 'snapshot.json'
+# Zero-padded so the chunks sort in order.
+CHUNK_FILE = 'rounds-{:06d}.npz'
+CHUNK_PATTERN = 'rounds-*.npz'
+DEFAULT_FLUSH_EVERY = 100
+
+
+class Recorder:
+    """Records the state of a `ReserveBook` once per round into the directory `filename`.
+
+    Every `flush_every` rounds, the rounds recorded since the last flush are
+    written to a new chunk and dropped from memory, so saving costs the same
+    however long the bot runs.
+    """
+
+    def __init__(self, filename: str = DEFAULT_RECORDING_FILE, flush_every: int = DEFAULT_FLUSH_EVERY):
+        self.filename = filename
+        self.flush_every = flush_every
+        self.pools: List[Pool] = None
+        self.chunks = 0
+        self.rounds: List[int] = []
+        self.reserves: List[np.ndarray] = []
+        self.fee_bps: List[np.ndarray] = []
+
+    def record(self, round: int, book: ReserveBook) -> None:
+        if self.pools is None:
+            self.pools = book.pools
+        assert book.pools is self.pools, 'A recording covers a single list of pools.'
+        self.rounds.append(round)
+        self.reserves.append(book.reserves.copy())
+        self.fee_bps.append(book.fee_bps.copy())
+        if len(self.rounds) >= self.flush_every:
+            self.save()
+
+    def save(self) -> None:
+        """Writes the rounds recorded since the last call to a new chunk."""
+        if self.pools is None or not self.rounds:
+            return
+        if self.chunks == 0:
+            os.makedirs(self.filename, exist_ok=True)
+            with open(os.path.join(self.filename, SNAPSHOT_FILE), 'w') as f:
+                json.dump(encode_snapshot(self.pools), f)
+        chunk = os.path.join(self.filename, CHUNK_FILE.format(self.chunks))
+        logging.info(f'Saving {len(self.rounds)} recorded rounds to `{chunk}`.')
+        np.savez_compressed(
+            chunk,
+            rounds=np.array(self.rounds, dtype=np.int64),
+            reserves=np.array(self.reserves, dtype=np.int64).reshape(-1, len(self.pools), 2),
+            fee_bps=np.array(self.fee_bps, dtype=np.int64).reshape(-1, len(self.pools)),
+        )
+        self.chunks += 1
+        self.rounds, self.reserves, self.fee_bps = [], [], []
+
+
+@dataclass
+class Recording:
+    pools: List[Pool]
+    rounds: np.ndarray
+    reserves: np.ndarray
+    fee_bps: np.ndarray
+
+    @classmethod
+    def load(cls, filename: str, algod: AlgodClient = None, indexer: IndexerClient = None) -> 'Recording':
+        """Loads the directory written by a `Recorder`, or a single archive also holding the ``snapshot``."""
+        if not os.path.isdir(filename):
+            with np.load(filename) as archive:
+                pools, _ = decode_snapshot(json.loads(str(archive['snapshot'])), algod, indexer, filename)
+                return cls(pools, archive['rounds'], archive['reserves'], archive['fee_bps'])
+
+        with open(os.path.join(filename, SNAPSHOT_FILE)) as f:
+            pools, _ = decode_snapshot(json.load(f), algod, indexer, filename)
+        chunks = []
+        for chunk in sorted(glob.glob(os.path.join(filename, CHUNK_PATTERN))):
+            with np.load(chunk) as archive:
+                chunks.append((archive['rounds'], archive['reserves'], archive['fee_bps']))
+        if not chunks:
+            return cls(pools, np.zeros(0, dtype=np.int64), np.zeros((0, len(pools), 2), dtype=np.int64), np.zeros((0, len(pools)), dtype=np.int64))
+        rounds, reserves, fee_bps = (np.concatenate(columns) for columns in zip(*chunks))
+        return cls(pools, rounds, reserves, fee_bps)
+
+    def __len__(self) -> int:
+        return len(self.rounds)
+
+    def select(self, pool_ids: np.ndarray) -> 'Recording':
+        """The recording restricted to the pools `pool_ids`."""
+        return Recording(
+            [self.pools[i] for i in pool_ids],
+            self.rounds,
+            self.reserves[:, pool_ids],
+            self.fee_bps[:, pool_ids]
+        )
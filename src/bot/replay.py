@@ -0,0 +1,142 @@
+"""Offline replay of a `bot.recording` through the bot's search and sizing.
+
+Each recorded round goes through the same `RoundPipeline` as `BotClient.run`,
+with the reserves loaded from the recording instead of algod, so strategy and
+speed changes can be measured deterministically without network access.
+"""
+from typing import Dict, Iterable, List
+from dataclasses import dataclass, field
+import logging
+
+import numpy as np
+from algosdk import constants, transaction
+
+from .asset import Asset, ALGO
+from .arbitrage import ArbitrageGraph
+from .search import ENUMERATE, DEFAULT_SEARCH
+from .pipeline import RoundPipeline
+from .scheduler import DEFAULT_BUDGETS, RoundContext
+from .recording import Recording
+from .client import DEFAULT_CUTOFF, DEFAULT_MAX_AMOUNT_IN, DEFAULT_TOP_K
+
+
+class ReplayAlgod:
+    """Stands in for `AlgodClient` during a replay, answering from the replayed round only."""
+
+    def __init__(self, round: int = 0):
+        self.round = round
+
+    def status(self) -> dict:
+        return {'last-round': self.round}
+
+    def suggested_params(self) -> transaction.SuggestedParams:
+        return transaction.SuggestedParams(0, self.round, self.round + 1000, '', min_fee=constants.MIN_TXN_FEE)
+
+    def __getattr__(self, name):
+        raise RuntimeError(f'`{name}` is not available while replaying.')
+
+
+@dataclass
+class Trade:
+    round: int
+    path: str
+    amount_in: int
+    profit: int
+
+
+@dataclass
+class ReplayReport:
+    rounds: int = 0
+    opportunities: int = 0
+    trades: List[Trade] = field(default_factory=list)
+    timings: Dict[str, List[float]] = field(default_factory=dict)
+
+    @property
+    def pnl(self) -> int:
+        return sum(trade.profit for trade in self.trades)
+
+    def add_timings(self, context: RoundContext) -> None:
+        for stage, seconds in context.timings.items():
+            self.timings.setdefault(stage, []).append(seconds)
+
+    def summary(self) -> dict:
+        return {
+            'rounds': self.rounds,
+            'opportunities': self.opportunities,
+            'trades': len(self.trades),
+            'pnl': self.pnl,
+            'timings': {
+                stage: {
+                    'total': float(np.sum(seconds)),
+                    'mean': float(np.mean(seconds)),
+                    'p50': float(np.percentile(seconds, 50)),
+                    'p99': float(np.percentile(seconds, 99)),
+                    'max': float(np.max(seconds)),
+                }
+                for stage, seconds in self.timings.items()
+            },
+        }
+
+
+class Replay:
+    """Runs a recording through the refresh, search and submit stages of `BotClient.run`.
+
+    Nothing is sent: the opportunities a `SubmissionPlanner` picks become
+    `Trade`s, with an unlimited budget, and trades don't move the recorded
+    reserves. Fees come from a `FeeTable` at the minimum fee. Pools
+    that need their SDK to be quoted or to price their fees, like Pact
+    stableswaps, are left out.
+    """
+
+    budgets = DEFAULT_BUDGETS
+
+    def __init__(self, recording: Recording):
+        quotable = [i for i, pool in enumerate(recording.pools) if pool.is_constant_product and pool.swap_min_fees is not None]
+        self.recording = recording.select(quotable)
+        self.algod = ReplayAlgod()
+        for pool in self.recording.pools:
+            pool.algod = self.algod
+        self.latest_round = 0
+
+    def is_stale(self, round: int) -> bool:
+        return False
+
+    def run(self,
+            base_assets: Iterable[Asset] = (ALGO,),
+            cutoff: int = DEFAULT_CUTOFF,
+            max_amount_in: int = DEFAULT_MAX_AMOUNT_IN,
+            top_k: int = DEFAULT_TOP_K,
+            search: str = DEFAULT_SEARCH,
+            workers: int = 0) -> ReplayReport:
+        recording = self.recording
+        graph = ArbitrageGraph(recording.pools)
+        pipeline = RoundPipeline(graph, base_assets, cutoff, max_amount_in, search, top_k, workers)
+        if search == ENUMERATE:
+            logging.info(f'Replaying {len(recording)} rounds over {len(pipeline.searcher.index)} cycles.')
+        else:
+            logging.info(f'Replaying {len(recording)} rounds over {len(graph.pools)} pools.')
+
+        report = ReplayReport()
+        try:
+            for round, reserves, fee_bps in zip(recording.rounds, recording.reserves, recording.fee_bps):
+                self.algod.round = self.latest_round = int(round)
+                context = RoundContext(self, self.latest_round)
+
+                with context.stage('refresh'):
+                    for pool, pool_reserves, pool_fee_bps in zip(recording.pools, reserves, fee_bps):
+                        pool.restore_state(pool_reserves, pool_fee_bps)
+                    pipeline.refresh(self.algod.suggested_params())
+
+                with context.stage('search'):
+                    opportunities = pipeline.search()
+                    report.opportunities += len(opportunities)
+
+                with context.stage('submit'):
+                    for plan in pipeline.plan(opportunities):
+                        report.trades.append(Trade(self.latest_round, repr(plan.path), plan.amount_in, plan.profit))
+
+                report.rounds += 1
+                report.add_timings(context)
+        finally:
+            pipeline.close()
+        return report
@@ -0,0 +1,105 @@
+from typing import Dict, Iterator
+from contextlib import contextmanager
+import threading
+import logging
+import time
+
+from algosdk.v2client.algod import AlgodClient
+
+from .exceptions import StaleRoundError
+from .metrics import METRICS
+
+DEFAULT_BUDGETS = {
+    'refresh': 1.0,
+    'search': 0.3,
+    'submit': 1.0,
+}
+DEFAULT_RETRY_DELAY = 1.0
+
+
+class RoundScheduler:
+    """Drives the bot once per new round instead of busy-polling.
+
+    A daemon thread blocks on algod's `status_after_block` and records the
+    latest round; `rounds` yields a `RoundContext` for it as soon as it lands.
+    Rounds that land while the previous one is still being processed are
+    coalesced, so at most one pipeline runs per round.
+    """
+
+    def __init__(self, algod: AlgodClient, budgets: Dict[str, float] = None):
+        self.algod = algod
+        self.budgets = DEFAULT_BUDGETS if budgets is None else budgets
+        self.latest_round = algod.status()['last-round']
+        self.latest_round_seen = time.perf_counter()
+        self._new_round = threading.Condition()
+        self._watcher = threading.Thread(target=self._watch, daemon=True)
+        self._watcher.start()
+
+    def rounds(self) -> Iterator['RoundContext']:
+        last_round = None
+        while True:
+            with self._new_round:
+                self._new_round.wait_for(lambda: self.latest_round != last_round)
+                if last_round is not None and self.latest_round > last_round + 1:
+                    METRICS.inc('coalesced_rounds', self.latest_round - last_round - 1)
+                last_round = self.latest_round
+                seen = self.latest_round_seen
+            METRICS.inc('rounds')
+            yield RoundContext(self, last_round, seen)
+
+    def is_stale(self, round: int) -> bool:
+        return self.latest_round > round
+
+    def _watch(self):
+        while True:
+            try:
+                status = self.algod.status_after_block(self.latest_round)
+            except Exception:
+                logging.exception('Failed waiting for the next round.')
+                time.sleep(DEFAULT_RETRY_DELAY)
+                continue
+            with self._new_round:
+                if status['last-round'] > self.latest_round:
+                    self.latest_round = status['last-round']
+                    self.latest_round_seen = time.perf_counter()
+                self._new_round.notify_all()
+
+
+class RoundContext:
+    """Work done for a single round, split into budgeted stages.
+
+    `elapsed` counts from `started`, when the round was first seen, so it
+    includes the time the round waited for the previous one to finish.
+    """
+
+    def __init__(self, scheduler: RoundScheduler, round: int, started: float = None):
+        self.scheduler = scheduler
+        self.round = round
+        self.started = time.perf_counter() if started is None else started
+        self.timings: Dict[str, float] = {}
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def check(self) -> None:
+        """Raises `StaleRoundError` if a newer round already arrived."""
+        if self.scheduler.is_stale(self.round):
+            METRICS.inc('stale_rounds')
+            raise StaleRoundError(f'Round {self.round} was superseded by round {self.scheduler.latest_round}.')
+
+    @contextmanager
+    def stage(self, name: str):
+        """Times a stage, aborting it beforehand if the round is stale and warning when over budget."""
+        self.check()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            METRICS.observe('stage_seconds', duration, stage=name)
+            previous = self.timings.get(name, 0.0)
+            self.timings[name] = previous + duration
+            budget = self.scheduler.budgets.get(name)
+            if budget is not None and previous <= budget < self.timings[name]:
+                logging.warning(f'Stage `{name}` of round {self.round} took {self.timings[name]:.3f}s (budget {budget:.3f}s).')
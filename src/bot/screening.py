@@ -0,0 +1,126 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from .pool import BasePool
+from .cycles import CycleIndex
+from .quote import BPS
+
+
+class ReserveBook:
+    """Reserves of a list of pools kept in NumPy arrays.
+
+    ``reserves[i, k]`` is the supply of ``pools[i].assets[k]``. Edge `2 i + d`
+    is pool `i` swapped in direction `d`, as in `CycleIndex.directions`.
+    """
+
+    def __init__(self, pools: List[BasePool]):
+        self.pools = pools
+        self.reserves = np.zeros((len(pools), 2), dtype=np.int64)
+        self.fee_bps = np.zeros(len(pools), dtype=np.int64)
+        self.mobius = np.zeros((2 * len(pools), 3))
+
+    def update(self) -> np.ndarray:
+        """Reads the pools' current state and returns the ids of the pools whose reserves changed.
+
+        Every pool counts as changed on the first call.
+        """
+        reserves = np.array([[pool.supply(asset) for asset in pool.assets] for pool in self.pools], dtype=np.int64)
+        fee_bps = np.array([getattr(pool, 'fee_bps', 0) for pool in self.pools], dtype=np.int64)
+        changed = np.flatnonzero(np.any(reserves != self.reserves, axis=1) | (fee_bps != self.fee_bps))
+        self.reserves = reserves
+        self.fee_bps = fee_bps
+        for i in changed:
+            pool = self.pools[i]
+            self.mobius[2 * i] = pool.mobius(pool.assets[0])
+            self.mobius[2 * i + 1] = pool.mobius(pool.assets[1])
+        return changed
+
+    def edge_log_rates(self, after_fee: bool = True) -> np.ndarray:
+        """Marginal log-rate of every edge after fee, ``log(a / b)`` of its `mobius`, without ``log(1 - fee)`` unless `after_fee`.
+
+        That is ``log(R_out / R_in) + log(1 - fee)`` for constant product pools.
+        """
+        with np.errstate(divide='ignore'):
+            rates = np.log(self.mobius[:, 0]) - np.log(self.mobius[:, 1])
+        if not after_fee:
+            rates -= np.repeat(np.log1p(-self.fee_bps / BPS), 2)
+        return rates
+
+
+class Screener:
+    """Scores the cycles of a `CycleIndex` at once, through the pools currently
+    selected for their hops."""
+
+    def __init__(self, index: CycleIndex):
+        self.index = index
+
+    def estimate_profit(self, book: ReserveBook, cycle_ids: np.ndarray, max_amount_in: int) -> np.ndarray:
+        """Maximum profit of the cycles `cycle_ids` according to their composed Möbius functions.
+
+        This is the vectorized counterpart of `ArbitragePath.optimal_amount_in_analytic`
+        without the integer refinement, so it is an estimate ignoring rounding.
+        """
+        return estimate_profit(book.mobius, self.index.hops[cycle_ids], self.index.directions[cycle_ids], max_amount_in)[0]
+
+    def log_rates(self, book: ReserveBook, after_fee: bool = True, cycle_ids: np.ndarray = None) -> np.ndarray:
+        """Marginal log-rate of the cycles `cycle_ids`, or of every cycle."""
+        if cycle_ids is None:
+            cycle_ids = np.arange(len(self.index))
+        return log_rates(book.edge_log_rates(after_fee), self.index.hops[cycle_ids], self.index.directions[cycle_ids])
+
+    def screen(self, book: ReserveBook, after_fee: bool = True, threshold: float = 0.0) -> np.ndarray:
+        """Ids of the cycles whose marginal log-rate exceeds `threshold`, best first."""
+        rates = self.log_rates(book, after_fee)
+        candidates = np.flatnonzero(rates > threshold)
+        return candidates[np.argsort(-rates[candidates])]
+
+
+def estimate_profit(mobius: np.ndarray, hops: np.ndarray, directions: np.ndarray, max_amount_in) -> Tuple[np.ndarray, np.ndarray]:
+    """Maximum profit, and the amount in making it, of the cycles given as rows of
+    `CycleIndex.hops` and `CycleIndex.directions`, from the `ReserveBook.mobius` of the edges."""
+    a = np.ones(len(hops))
+    b = np.ones(len(hops))
+    c = np.zeros(len(hops))
+    for j in range(hops.shape[1]):
+        edges = 2 * hops[:, j] + directions[:, j]
+        _a, _b, _c = mobius[edges].T
+        active = hops[:, j] >= 0
+        a, b, c = (
+            np.where(active, a * _a, a),
+            np.where(active, b * _b, b),
+            np.where(active, _b * c + _c * a, c)
+        )
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = np.clip((np.sqrt(a * b) - b) / c, 0, max_amount_in)
+        profit = a * x / (b + c * x) - x
+    profitable = a > b
+    return np.where(profitable, profit, 0.0), np.where(profitable, x, 0.0)
+
+
+def log_rates(edge_log_rates: np.ndarray, hops: np.ndarray, directions: np.ndarray) -> np.ndarray:
+    """Marginal log-rate of the cycles given as rows of `CycleIndex.hops` and `CycleIndex.directions`."""
+    edges = 2 * hops + directions
+    return np.where(hops >= 0, edge_log_rates[edges], 0.0).sum(axis=1)
+
+
+def score_cycles(mobius: np.ndarray,
+                 edge_log_rates: np.ndarray,
+                 hops: np.ndarray,
+                 directions: np.ndarray,
+                 fees: np.ndarray,
+                 prices: np.ndarray,
+                 max_amount_in: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Estimated profits in ALGO after `fees` of cycles starting at assets worth `prices`, as in `estimate_profit`.
+
+    Since swaps are concave, a cycle with marginal rate `r` makes at most
+    ``max_amount_in * (r - 1)``: cycles where that can't beat their fees are
+    not estimated, their profit is 0. Returns the profits and whether each
+    cycle was estimated.
+    """
+    viable = max_amount_in * np.expm1(log_rates(edge_log_rates, hops, directions)) > fees
+    profits = np.zeros(len(hops))
+    profit, _ = estimate_profit(mobius, hops[viable], directions[viable], max_amount_in / prices[viable])
+    profits[viable] = profit * prices[viable] - fees[viable]
+    return profits, viable
@@ -0,0 +1,130 @@
+"""Search strategies of `BotClient.run`.
+
+Every round, `search` is given the pools whose reserves changed, and the
+bases of the `Numeraire` whose price changed, and returns the best
+opportunities as `(path, fee)`, with the fee in ALGO, best first.
+"""
+from typing import List, Tuple
+
+import numpy as np
+
+from .asset import Asset
+from .arbitrage import ArbitrageGraph, ArbitragePath
+from .cycles import CycleIndex
+from .screening import ReserveBook, score_cycles
+from .opportunity import OpportunityQueue
+from .bellman_ford import BellmanFord, DEFAULT_MAX_CYCLE_LENGTH
+from .workers import ScoringWorkers
+from .numeraire import Numeraire
+from .fees import FeeTable
+from .metrics import METRICS
+
+ENUMERATE = 'enumerate'
+BELLMAN_FORD = 'bellman-ford'
+SEARCHES = (ENUMERATE, BELLMAN_FORD)
+DEFAULT_SEARCH = ENUMERATE
+
+Opportunity = Tuple[ArbitragePath, int]
+
+
+class CycleSearch:
+    """Rescores the enumerated cycles of a `CycleIndex` through the changed
+    pools and keeps the `top_k` most profitable of an `OpportunityQueue`.
+
+    Every hop goes through the pool of its pair with the best rate, see
+    `CycleIndex.select`. Since swaps are concave, a cycle with marginal rate
+    `r` makes at most ``max_amount_in * (r - 1)``: cycles where that can't beat
+    the fees are pruned before their profit is estimated.
+
+    A cycle through several base assets is enumerated once per base; only
+    the rotation with the best profit in ALGO is queued. Profits are kept in
+    ALGO, so the cycles through a base whose price changed are rescored too.
+
+    The cycles are scored in the worker processes of `workers`, if given.
+    """
+
+    def __init__(self, index: CycleIndex, fee_table: FeeTable, numeraire: Numeraire, top_k: int, workers: ScoringWorkers = None):
+        self.index = index
+        self.fee_table = fee_table
+        self.numeraire = numeraire
+        self.top_k = top_k
+        self.workers = workers
+        self.queue = OpportunityQueue(len(index))
+
+    def __len__(self):
+        return len(self.queue)
+
+    @property
+    def assets(self) -> List[Asset]:
+        return self.index.assets
+
+    def search(self, book: ReserveBook, dirty: np.ndarray, max_amount_in: int, repriced: np.ndarray = ()) -> List[Opportunity]:
+        index = self.index
+        with METRICS.span('cycle_search'):
+            if len(dirty):
+                index.select(book)
+            cycle_ids = index.cycles_touching(dirty)
+            if len(repriced):
+                cycle_ids = np.union1d(cycle_ids, index.cycles_rooted_at(repriced))
+        with METRICS.span('screening'):
+            fees = self.fee_table.cycle_fees(index, cycle_ids)
+            prices = self.numeraire.prices[index.bases[cycle_ids]]
+            if self.workers is None:
+                profits, viable = score_cycles(
+                    book.mobius, book.edge_log_rates(), index.hops[cycle_ids], index.directions[cycle_ids], fees, prices, max_amount_in
+                )
+            else:
+                profits, viable = self.workers.score(book, cycle_ids, fees, prices, max_amount_in)
+            METRICS.inc('pruned_cycles', int(np.count_nonzero(~viable)))
+        with METRICS.span('ranking'):
+            # The rotations of a cycle share its pools, so they are rescored together.
+            profits = np.where(index.best_rotations(cycle_ids, profits), profits, 0)
+            self.queue.update(cycle_ids, profits)
+            top = np.array([i for i, _ in self.queue.top(self.top_k)], dtype=np.int64)
+            return list(zip([index.path(i) for i in top], self.fee_table.cycle_fees(index, top).tolist()))
+
+
+class NegativeCycleSearch:
+    """Finds profitable cycles of up to `max_cycle_length` hops with `BellmanFord`
+    instead of enumerating them, so longer cycles and more assets stay cheap.
+
+    The cycles found are rotated to start at the first of `assets` they go
+    through and the `top_k` with the best marginal rate are returned; they are sized,
+    and their fees subtracted, by the `SubmissionPlanner`.
+    """
+
+    def __init__(self,
+                 graph: ArbitrageGraph,
+                 assets: List[Asset],
+                 fee_table: FeeTable,
+                 top_k: int,
+                 max_cycle_length: int = DEFAULT_MAX_CYCLE_LENGTH):
+        self.graph = graph
+        self.assets = list(assets)
+        self.fee_table = fee_table
+        self.top_k = top_k
+        self.bellman_ford = BellmanFord(graph.pools, max_cycle_length)
+        self._found = 0
+
+    def __len__(self):
+        return self._found
+
+    def search(self, book: ReserveBook, dirty: np.ndarray, max_amount_in: int, repriced: np.ndarray = ()) -> List[Opportunity]:
+        # Cycles are ranked by their rate, which doesn't depend on the prices of the bases.
+        pools = self.graph.pools
+        with METRICS.span('cycle_search'):
+            cycles = self.bellman_ford.update(book, dirty)
+        with METRICS.span('ranking'):
+            found = []
+            for edges in cycles:
+                weight = self.bellman_ford.weights[edges].sum()
+                fee = int(self.fee_table.fees[edges // 2].sum())
+                hops = [(pools[edge // 2], pools[edge // 2].assets[edge % 2]) for edge in edges.tolist()]
+                # Every rotation has the same rate, so the cycle is rooted once, at the first of `assets`.
+                roots = {asset_in: k for k, (_, asset_in) in reversed(list(enumerate(hops)))}
+                k = next((roots[asset] for asset in self.assets if asset in roots), None)
+                if k is not None:
+                    found.append((weight, self.graph.path(hops[k:] + hops[:k]), fee))
+            found.sort(key=lambda item: item[0])
+            self._found = len(found)
+            return [(path, fee) for _, path, fee in found[:self.top_k]]
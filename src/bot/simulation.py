@@ -0,0 +1,132 @@
+"""Pre-submission checks of signed groups.
+
+A simulator returns the actual profit of each group in the asset it starts
+and ends at, and the fees it pays, or a failure if the group would be rejected. `AlgodSimulator`
+asks algod's simulate endpoint and `LocalSimulator` replays the swaps against
+the local pools, standing in for it offline.
+"""
+from typing import Iterator, List, Optional, Union
+from dataclasses import dataclass
+import asyncio
+import logging
+
+import msgpack
+from algosdk import encoding
+
+from .asset import Asset, ALGO
+from .aio import AsyncAlgodClient
+from .pool import Pool
+
+
+@dataclass
+class SimulationResult:
+    profit: Optional[int] = None
+    fee: int = 0
+    failure: Optional[str] = None
+
+    def profit_after_fee(self, price: float = 1.0) -> Optional[float]:
+        """Profit in ALGO net of fees, converted at `price` ALGO per unit of the group's asset; None if it failed."""
+        return None if self.profit is None else self.profit * price - self.fee
+
+
+class AlgodSimulator:
+    """Runs every group through algod's simulate endpoint, concurrently."""
+
+    def __init__(self, client: AsyncAlgodClient, address: str):
+        self.client = client
+        self.address = address
+
+    async def simulate(self, groups: List[bytes], assets: List[Asset]) -> List[SimulationResult]:
+        return await asyncio.gather(*(self._simulate(group, asset) for group, asset in zip(groups, assets)))
+
+    async def _simulate(self, group: bytes, asset: Asset) -> SimulationResult:
+        try:
+            response = await self.client.simulate_raw_transactions(decode_group(group))
+        except Exception as e:
+            logging.warning(f'Failed simulating transaction group: {e!r}')
+            return SimulationResult(failure=repr(e))
+
+        result = response['txn-groups'][0]
+        if result.get('failure-message'):
+            return SimulationResult(failure=result['failure-message'])
+
+        profit = fee = 0
+        for txn_result in result['txn-results']:
+            outer = txn_result['txn-result']['txn']['txn']
+            fee += outer.get('fee', 0) if outer.get('snd') == self.address else 0
+            for txn in _walk(txn_result['txn-result']):
+                profit += self._balance_change(txn, asset)
+        return SimulationResult(profit, fee)
+
+    def _balance_change(self, txn: dict, asset: Asset) -> int:
+        """Change of the account's balance of `asset` due to a single transaction in algod's JSON format, apart from its fee."""
+        change = 0
+        if txn.get('type') == 'pay' and asset == ALGO:
+            amount = txn.get('amt', 0)
+            change += amount if txn.get('rcv') == self.address else 0
+            change -= amount if txn.get('snd') == self.address else 0
+        elif txn.get('type') == 'axfer' and txn.get('xaid') == asset.index:
+            amount = txn.get('aamt', 0)
+            change += amount if txn.get('arcv') == self.address else 0
+            change -= amount if txn.get('snd') == self.address else 0
+        return change
+
+
+class LocalSimulator:
+    """Replays the swaps of each group against the current state of `pools`.
+
+    Each swap fails, like on chain, if it receives less than the minimum
+    amount out of its application call, found at the pool's
+    `swap_min_out_arg`. The swaps of a group are quoted independently, so a
+    group swapping twice on the same pool is approximated. Groups with
+    transfers that aren't swaps of a known pool fail.
+    """
+
+    def __init__(self, pools: List[Pool]):
+        self.pools = {encoding.decode_address(pool.address): pool for pool in pools}
+
+    async def simulate(self, groups: List[bytes], assets: List[Asset]) -> List[SimulationResult]:
+        return [self.simulate_group(group, asset) for group, asset in zip(groups, assets)]
+
+    def simulate_group(self, group: bytes, asset: Asset) -> SimulationResult:
+        txns = [signed['txn'] for signed in decode_group(group)]
+        profit = 0
+        for i, txn in enumerate(txns):
+            if txn['type'] not in ('pay', 'axfer'):
+                continue
+            receiver = txn.get('rcv') or txn.get('arcv')
+            pool = self.pools.get(receiver)
+            if pool is None:
+                return SimulationResult(failure=f'Transfer {i} goes to {encoding.encode_address(receiver)}, which is not a known pool.')
+            index = txn.get('xaid', 0)
+            asset_in = next((a for a in pool.assets if a.index == index), None)
+            app_call = next((call for call in txns[i + 1:] if call['type'] == 'appl'), None)
+            if asset_in is None or app_call is None:
+                return SimulationResult(failure=f'Transfer {i} to {pool.address} is not a swap of the pool.')
+            amount_in = txn.get('amt') or txn.get('aamt', 0)
+            min_amount_out = int.from_bytes(app_call['apaa'][pool.swap_min_out_arg], 'big')
+            amount_out = pool.quote(asset_in, amount_in)
+            if amount_out < min_amount_out:
+                return SimulationResult(failure=f'Swap on {pool.address} would receive {amount_out} < {min_amount_out}.')
+            if asset_in == asset:
+                profit -= amount_in
+            if pool.get_other_asset(asset_in) == asset:
+                profit += amount_out
+        return SimulationResult(profit, sum(txn.get('fee', 0) for txn in txns))
+
+
+Simulator = Union[AlgodSimulator, LocalSimulator]
+
+
+def decode_group(group: bytes) -> List[dict]:
+    """The signed transaction maps of a group encoded by `GroupBuilder.sign`."""
+    unpacker = msgpack.Unpacker(raw=False, strict_map_key=False)
+    unpacker.feed(group)
+    return list(unpacker)
+
+
+def _walk(txn_result: dict) -> Iterator[dict]:
+    """The transaction of a simulate result and, recursively, its inner transactions."""
+    yield txn_result['txn']['txn']
+    for inner in txn_result.get('inner-txns', []):
+        yield from _walk(inner)
@@ -0,0 +1,87 @@
+"""Versioned, SDK-independent snapshots of the tracked pools and compiled cycles.
+
+A snapshot is a JSON document::
+
+    {
+        "version": 1,
+        "assets": [[index, decimals, name, unit], ...],
+        "pools": [Pool.to_snapshot(), ...],
+        "cycles": [{"asset": index, "cutoff": int, "hops": [[...]], "directions": [[...]]}, ...]
+    }
+
+Cycle tables are `CycleIndex.hops` and `CycleIndex.directions`, referring to
+pools by their position in "pools".
+"""
+from typing import Dict, List, Tuple
+from dataclasses import astuple
+import json
+
+import numpy as np
+from algosdk.v2client.algod import AlgodClient
+from algosdk.v2client.indexer import IndexerClient
+
+from .asset import Asset, ALGO
+from .pool import Pool
+from .dex.pactfi import PactfiPool
+from .dex.tinyman import TinymanPool
+from .dex.algofi import AlgofiPool
+from .exceptions import SnapshotError
+
+SNAPSHOT_VERSION = 1
+POOL_CLASSES = {cls.__name__: cls for cls in (TinymanPool, PactfiPool, AlgofiPool)}
+
+CycleTables = Dict[Tuple[Asset, int], Tuple[np.ndarray, np.ndarray]]
+
+
+def dump_snapshot(filename: str, pools: List[Pool], cycle_tables: CycleTables = None) -> None:
+    with open(filename, 'w') as fp:
+        json.dump(encode_snapshot(pools, cycle_tables), fp)
+
+
+def load_snapshot(filename: str, algod: AlgodClient, indexer: IndexerClient) -> Tuple[List[Pool], CycleTables]:
+    """Restores the pools and cycle tables of a snapshot without any network call."""
+    with open(filename) as fp:
+        snapshot = json.load(fp)
+    return decode_snapshot(snapshot, algod, indexer, filename)
+
+
+def encode_snapshot(pools: List[Pool], cycle_tables: CycleTables = None) -> dict:
+    assets = {asset for pool in pools for asset in pool.assets}
+    return {
+        'version': SNAPSHOT_VERSION,
+        'assets': [astuple(asset) for asset in sorted(assets)],
+        'pools': [pool.to_snapshot() for pool in pools],
+        'cycles': [
+            {
+                'asset': asset.index,
+                'cutoff': cutoff,
+                'hops': hops.tolist(),
+                'directions': directions.tolist(),
+            }
+            for (asset, cutoff), (hops, directions) in (cycle_tables or {}).items()
+        ],
+    }
+
+
+def decode_snapshot(snapshot: dict, algod: AlgodClient, indexer: IndexerClient, source: str = 'snapshot') -> Tuple[List[Pool], CycleTables]:
+    if snapshot.get('version') != SNAPSHOT_VERSION:
+        raise SnapshotError(f'Unsupported snapshot version {snapshot.get("version")} in `{source}`.')
+
+    assets = {ALGO.index: ALGO}
+    assets.update({entry[0]: Asset(*entry) for entry in snapshot['assets']})
+    try:
+        pools = [
+            POOL_CLASSES[record['class']].from_snapshot(algod, indexer, record, assets)
+            for record in snapshot['pools']
+        ]
+    except KeyError as e:
+        raise SnapshotError(f'Malformed snapshot `{source}`: {e!r}.')
+
+    tables = {
+        (assets[entry['asset']], entry['cutoff']): (
+            np.array(entry['hops'], dtype=np.int32).reshape(-1, entry['cutoff']),
+            np.array(entry['directions'], dtype=np.int8).reshape(-1, entry['cutoff'])
+        )
+        for entry in snapshot['cycles']
+    }
+    return pools, tables
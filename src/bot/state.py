@@ -0,0 +1,32 @@
+from typing import Dict, List, Optional, Union
+from dataclasses import dataclass
+import base64
+
+
+@dataclass(frozen=True)
+class StateQuery:
+    """The application state a pool keeps its reserves in: the local state of
+    `address` if given, otherwise the global state of `app_id`."""
+    app_id: int
+    address: Optional[str] = None
+
+    @property
+    def path(self) -> str:
+        if self.address is not None:
+            return f'/accounts/{self.address}/applications/{self.app_id}'
+        return f'/applications/{self.app_id}'
+
+    def parse(self, response: dict) -> List[dict]:
+        if self.address is not None:
+            return response['app-local-state'].get('key-value', [])
+        return response['params'].get('global-state', [])
+
+
+def decode_state(key_values: List[dict]) -> Dict[str, Union[int, bytes]]:
+    """Decodes a TEAL key/value store as returned by algod."""
+    state = {}
+    for item in key_values:
+        key = base64.b64decode(item['key']).decode(errors='replace')
+        value = item['value']
+        state[key] = value['uint'] if value['type'] == 2 else base64.b64decode(value['bytes'])
+    return state
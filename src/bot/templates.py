@@ -0,0 +1,148 @@
+"""Pre-built swap transactions, assembled into arbitrage groups at submit time.
+
+Transactions are kept as their canonical msgpack maps (sorted keys, no zero
+values), so filling in a template is a few dictionary updates and a group is
+hashed, signed and encoded without going through the SDK's transaction
+objects, which decode every address again on each encoding.
+"""
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import hashlib
+import logging
+
+import msgpack
+from algosdk import constants, encoding, transaction
+
+from .asset import Asset
+from .account import Account
+from .exceptions import PoolTransactionError
+
+DEFAULT_MAX_WORKERS = 32
+
+TxnFields = Dict[str, object]
+
+
+@dataclass
+class SwapTemplate:
+    """The transactions of a swap, where only the amounts and validity window change.
+
+    `fields[amount_in_txn][amount_key]` is the amount in and the
+    `min_out_arg`-th argument of the application call `fields[app_call_txn]`
+    is the minimum amount out.
+    """
+    fields: List[TxnFields]
+    amount_in_txn: int
+    amount_key: str
+    app_call_txn: int
+    min_out_arg: int
+
+    @classmethod
+    def from_txns(cls, txns: List[transaction.Transaction], min_out_arg: int) -> 'SwapTemplate':
+        transfers = (transaction.PaymentTxn, transaction.AssetTransferTxn)
+        amount_in_txn = next(i for i, txn in enumerate(txns) if isinstance(txn, transfers))
+        app_call_txn = next(i for i, txn in enumerate(txns) if isinstance(txn, transaction.ApplicationCallTxn))
+        amount_key = 'amt' if isinstance(txns[amount_in_txn], transaction.PaymentTxn) else 'aamt'
+        fields = [canonical(txn.dictify()) for txn in txns]
+        for txn_fields in fields:
+            txn_fields.pop('grp', None)
+        return cls(fields, amount_in_txn, amount_key, app_call_txn, min_out_arg)
+
+    def fill(self, amount_in: int, amount_out: int, first: int, last: int) -> List[TxnFields]:
+        fields = [{**txn_fields, 'fv': first, 'lv': last} for txn_fields in self.fields]
+        fields[self.amount_in_txn][self.amount_key] = amount_in
+        app_call = fields[self.app_call_txn]
+        app_call['apaa'] = list(app_call['apaa'])
+        app_call['apaa'][self.min_out_arg] = amount_out.to_bytes(8, 'big')
+        return fields
+
+
+class GroupBuilder:
+    """Assembles and signs arbitrage groups from per-pool `SwapTemplate`s.
+
+    Templates are built on first use, or up front with `prepare`, and rebuilt
+    only when the fee parameters change. Pools without a template fall back to
+    `prepare_internal_swap_txns`.
+    """
+
+    def __init__(self, account: Account):
+        self.account = account
+        self.suggested_params: transaction.SuggestedParams = None
+        self.templates: Dict[Tuple[object, Asset], Optional[SwapTemplate]] = {}
+        self._key: Tuple = None
+
+    def update(self, suggested_params: transaction.SuggestedParams) -> None:
+        key = (suggested_params.fee, suggested_params.flat_fee, suggested_params.min_fee, suggested_params.gh)
+        if key != self._key:
+            self._key = key
+            self.templates = {}
+        self.suggested_params = suggested_params
+
+    def prepare(self, pools: list, max_workers: int = DEFAULT_MAX_WORKERS) -> None:
+        """Builds the templates of both directions of `pools` concurrently, since it may load their SDK objects."""
+        keys = [(pool, asset_in) for pool in pools for asset_in in pool.assets]
+        with ThreadPoolExecutor(max_workers) as executor:
+            futures = {executor.submit(self.template, *key): key for key in keys}
+        for future, (pool, _) in futures.items():
+            if exception := future.exception():
+                logging.warning(f'Failed preparing the swap templates of {pool.__class__.__name__} {pool.address}: {exception!r}')
+
+    def template(self, pool, asset_in: Asset) -> Optional[SwapTemplate]:
+        key = (pool, asset_in)
+        if key not in self.templates:
+            self.templates[key] = pool.swap_template(self.account.address, asset_in, self.suggested_params)
+        return self.templates[key]
+
+    def build(self, path, amount_in: int) -> List[TxnFields]:
+        """The grouped transactions of `path` for `amount_in`, as canonical msgpack maps.
+
+        Raises `PoolTransactionError` if a pool swaps with transactions the account doesn't send.
+        """
+        params = self.suggested_params
+        fields = []
+        for edge in path.edges:
+            amount_out = edge.pool.quote(edge.asset_in, amount_in)
+            template = self.template(edge.pool, edge.asset_in)
+            if template is None:
+                txns = edge.pool.prepare_internal_swap_txns(self.account.address, edge.asset_in, amount_in, amount_out, params)
+                # Only the account's own transactions are signed, see `sign`.
+                if foreign := [txn.sender for txn in txns if txn.sender != self.account.address]:
+                    raise PoolTransactionError(f'Swap on {edge.pool.address} has transactions of {foreign[0]}, which the account can\'t sign.')
+                fields.extend(canonical(txn.dictify()) for txn in txns)
+            else:
+                fields.extend(template.fill(amount_in, amount_out, params.first, params.last))
+            amount_in = amount_out
+
+        txids = [checksum(constants.txid_prefix + pack(txn_fields)) for txn_fields in fields]
+        group = checksum(constants.tgid_prefix + pack({'txlist': txids}))
+        return [dict(sorted({**txn_fields, 'grp': group}.items())) for txn_fields in fields]
+
+    def sign(self, path, amount_in: int) -> bytes:
+        """The signed group of `path` for `amount_in`, encoded as algod expects it."""
+        signing_key = self.account.signing_key
+        signed = []
+        for txn_fields in self.build(path, amount_in):
+            signature = signing_key.sign(constants.txid_prefix + pack(txn_fields)).signature
+            signed.append(pack({'sig': signature, 'txn': txn_fields}))
+        return b''.join(signed)
+
+
+def canonical(fields: dict) -> TxnFields:
+    """Sorts the keys and drops the zero values of a transaction map, as `encoding.msgpack_encode` does."""
+    return {
+        key: canonical(value) if isinstance(value, dict) else value
+        for key, value in sorted(fields.items()) if value
+    }
+
+
+def pack(fields: dict) -> bytes:
+    return msgpack.packb(fields, use_bin_type=True)
+
+
+try:
+    hashlib.new('sha512_256')
+
+    def checksum(data: bytes) -> bytes:
+        return hashlib.new('sha512_256', data).digest()
+except ValueError:
+    checksum = encoding.checksum
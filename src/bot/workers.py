@@ -0,0 +1,134 @@
+"""Cycle scoring in worker processes.
+
+Every round, the Möbius coefficients and log-rates of the edges of a
+`ReserveBook`, and the pools selected for the hops of a `CycleIndex`, are
+copied once into a shared memory block. Workers read them in place and score
+disjoint slices of the cycles with `score_cycles`, so only cycle ids, fees and
+prices are pickled per round, never pools.
+"""
+from typing import List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+import multiprocessing
+import os
+
+import numpy as np
+
+from .cycles import CycleIndex
+from .screening import ReserveBook, score_cycles
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+# Below this many cycles per worker, sending a slice costs more than scoring it.
+DEFAULT_MIN_SLICE = 4096
+# Workers aren't forked from the bot, whose event loop and refresh threads
+# could leave locks held in the copy.
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+class SharedTables:
+    """The arrays `score_cycles` reads, laid out in one shared memory block.
+
+    The block is created if `name` is None, else attached to.
+    """
+
+    def __init__(self, n_edges: int, n_cycles: int, cutoff: int, name: Optional[str] = None):
+        self.shape = (n_edges, n_cycles, cutoff)
+        layout = [
+            ('mobius', (n_edges, 3), np.float64),
+            ('edge_log_rates', (n_edges,), np.float64),
+            ('hops', (n_cycles, cutoff), np.int32),
+            ('directions', (n_cycles, cutoff), np.int8),
+        ]
+        size = sum(int(np.prod(shape)) * np.dtype(dtype).itemsize for _, shape, dtype in layout)
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+
+        offset = 0
+        for key, shape, dtype in layout:
+            array = np.ndarray(shape, dtype=dtype, buffer=self.memory.buf, offset=offset)
+            setattr(self, key, array)
+            offset += array.nbytes
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    def publish(self, book: ReserveBook, index: CycleIndex) -> None:
+        self.mobius[:] = book.mobius
+        self.edge_log_rates[:] = book.edge_log_rates()
+        self.hops[:] = index.hops
+        self.directions[:] = index.directions
+
+    def score(self, cycle_ids: np.ndarray, fees: np.ndarray, prices: np.ndarray, max_amount_in: int) -> Tuple[np.ndarray, np.ndarray]:
+        return score_cycles(self.mobius, self.edge_log_rates, self.hops[cycle_ids], self.directions[cycle_ids], fees, prices, max_amount_in)
+
+    def close(self) -> None:
+        # The views must go before the buffer they point into.
+        del self.mobius, self.edge_log_rates, self.hops, self.directions
+        self.memory.close()
+
+
+# The tables of a worker process, attached by `_attach`.
+_tables: Optional[SharedTables] = None
+
+
+def _attach(name: str, shape: Tuple[int, int, int]) -> None:
+    global _tables
+    _tables = SharedTables(*shape, name=name)
+
+
+def _score(cycle_ids: np.ndarray, fees: np.ndarray, prices: np.ndarray, max_amount_in: int) -> Tuple[np.ndarray, np.ndarray]:
+    return _tables.score(cycle_ids, fees, prices, max_amount_in)
+
+
+class ScoringWorkers:
+    """A pool of `workers` processes scoring the cycles of `index`.
+
+    The cycles to score are split into at most `workers` slices of at least
+    `min_slice` cycles, so rounds touching few cycles are scored in the
+    calling process, from the same shared tables.
+    """
+
+    def __init__(self, index: CycleIndex, workers: int = DEFAULT_WORKERS, min_slice: int = DEFAULT_MIN_SLICE):
+        self.index = index
+        self.workers = workers
+        self.min_slice = min_slice
+        self.tables = SharedTables(2 * len(index.pools), len(index), index.cutoff)
+        self.executor = ProcessPoolExecutor(
+            workers,
+            mp_context=multiprocessing.get_context(START_METHOD),
+            initializer=_attach,
+            initargs=(self.tables.name, self.tables.shape)
+        )
+        # Started up front, since each one imports the bot again.
+        wait([self.executor.submit(os.getpid) for _ in range(workers)])
+
+    def score(self,
+              book: ReserveBook,
+              cycle_ids: np.ndarray,
+              fees: np.ndarray,
+              prices: np.ndarray,
+              max_amount_in: int) -> Tuple[np.ndarray, np.ndarray]:
+        """`score_cycles` of the cycles `cycle_ids` of `index` in `book`, merged in order."""
+        self.tables.publish(book, self.index)
+        n_slices = min(self.workers, len(cycle_ids) // self.min_slice)
+        if n_slices <= 1:
+            return self.tables.score(cycle_ids, fees, prices, max_amount_in)
+
+        slices = np.array_split(np.arange(len(cycle_ids)), n_slices)
+        futures = [self.executor.submit(_score, cycle_ids[s], fees[s], prices[s], max_amount_in) for s in slices]
+        results: List[Tuple[np.ndarray, np.ndarray]] = [future.result() for future in futures]
+        return np.concatenate([profits for profits, _ in results]), np.concatenate([viable for _, viable in results])
+
+    def close(self) -> None:
+        self.executor.shutdown()
+        self.tables.close()
+        self.tables.memory.unlink()
+
+    def __enter__(self) -> 'ScoringWorkers':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -1,13 +1,39 @@
 from utils import get_algod_and_indexer, get_account
 
-from bot.client import BotClient
-from bot.asset import fetch_assets
+from bot.client import BotClient, DEFAULT_TOP_K
+from bot.asset import Asset, fetch_assets
+from bot.exceptions import SnapshotError
+from bot.recording import Recorder
+from bot.metrics import METRICS
+from bot.search import SEARCHES, DEFAULT_SEARCH
+from bot.simulation import AlgodSimulator, LocalSimulator
+from bot.profiling import TickProfiler, DEFAULT_PROFILE_DIR, DEFAULT_PROFILE_EVERY
 
+import argparse
 import logging
 
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--base', type=int, action='append', metavar='ASSET_ID', help='search cycles from this asset, by default every asset held')
+    parser.add_argument('--search', choices=SEARCHES, default=DEFAULT_SEARCH, help='enumerate the cycles up to the cutoff once, or detect cycles of any length every round, see `bot.search`')
+    parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K, help='opportunities sized every round')
+    parser.add_argument('--workers', type=int, default=0, help='score the enumerated cycles in this many processes, see `bot.workers`')
+    parser.add_argument('--record', metavar='DIR', help='record the reserves of every round to DIR, see `bot.recording`')
+    parser.add_argument('--metrics-port', type=int, metavar='PORT', help='serve Prometheus metrics at localhost:PORT')
+    parser.add_argument('--metrics-file', metavar='FILE', help='write Prometheus metrics to FILE every few seconds')
+    parser.add_argument('--profile', action='store_true', help='profile ticks of the bot loop, see `bot.profiling`')
+    parser.add_argument('--profile-every', type=int, default=DEFAULT_PROFILE_EVERY, metavar='N', help='profile every Nth tick, 0 to disable')
+    parser.add_argument('--profile-threshold', type=float, metavar='SECONDS', help='also profile every tick slower than SECONDS')
+    parser.add_argument('--profile-dir', default=DEFAULT_PROFILE_DIR, metavar='DIR')
+    parser.add_argument('--simulate', choices=['algod', 'local'], help='simulate groups before sending them, with algod or against the local pools')
+    args = parser.parse_args()
+
     logging.basicConfig(level=logging.INFO)
+    if args.metrics_port:
+        METRICS.serve(args.metrics_port)
+    if args.metrics_file:
+        METRICS.write_periodically(args.metrics_file)
 
     algod, indexer = get_algod_and_indexer()
     account = get_account(algod)
@@ -16,8 +42,29 @@ def main():
         account.opt_in_asset(asset)
 
     bot = BotClient(algod, indexer, account)
+    try:
+        bot.load_state()
+    except FileNotFoundError:
+        logging.info('No snapshot found, fetching every pool.')
+    except SnapshotError as e:
+        logging.warning(f'{e} Fetching every pool.')
     bot.fetch_pools(assets)
-    bot.run()
+    recorder = Recorder(args.record) if args.record else None
+    profiler = TickProfiler(args.profile_dir, args.profile_every, args.profile_threshold) if args.profile else None
+    simulator = None
+    if args.simulate == 'algod':
+        simulator = AlgodSimulator(bot.aio, account.address)
+    elif args.simulate == 'local':
+        simulator = LocalSimulator(bot.pools)
+    base_assets = [Asset.from_index(algod, index) for index in args.base] if args.base else None
+    try:
+        bot.run(base_assets, search=args.search, top_k=args.top_k, workers=args.workers, recorder=recorder, profiler=profiler, simulator=simulator)
+    finally:
+        bot.close()
+        if recorder is not None:
+            recorder.save()
+        if profiler is not None:
+            logging.info(profiler.summary())
 
 
 if __name__ == '__main__':
@@ -0,0 +1,38 @@
+from bot.recording import Recording, DEFAULT_RECORDING_FILE
+from bot.replay import Replay
+from bot.search import SEARCHES, DEFAULT_SEARCH
+
+import argparse
+import json
+import logging
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replays a recording offline and prints a JSON report.')
+    parser.add_argument('recording', nargs='?', default=DEFAULT_RECORDING_FILE)
+    parser.add_argument('--cutoff', type=int)
+    parser.add_argument('--max-amount-in', type=int)
+    parser.add_argument('--base', type=int, action='append', metavar='ASSET_ID', help='search cycles from this asset too, by default only ALGO')
+    parser.add_argument('--search', choices=SEARCHES, default=DEFAULT_SEARCH)
+    parser.add_argument('--top-k', type=int, help='opportunities sized every round')
+    parser.add_argument('--workers', type=int, help='score the enumerated cycles in this many processes')
+    parser.add_argument('--trades', action='store_true', help='include every trade in the report')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    replay = Replay(Recording.load(args.recording))
+    assets = {asset.index: asset for pool in replay.recording.pools for asset in pool.assets}
+    base_assets = None
+    if args.base:
+        base_assets = [assets[0]] + [assets[index] for index in args.base if index != 0]
+    options = {'base_assets': base_assets, 'cutoff': args.cutoff, 'max_amount_in': args.max_amount_in, 'search': args.search, 'top_k': args.top_k, 'workers': args.workers}
+    report = replay.run(**{k: v for k, v in options.items() if v is not None})
+    summary = report.summary()
+    if args.trades:
+        summary['trades'] = [vars(trade) for trade in report.trades]
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The bot runs from `src`, as in `python3 src/main.py`.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
@@ -0,0 +1,44 @@
+"""Rotations of the cycles of a `CycleIndex` rooted at several assets."""
+import numpy as np
+import pytest
+
+from benchmark import make_pools
+from bot.arbitrage import ArbitrageGraph
+from bot.asset import ALGO
+
+
+@pytest.fixture
+def index():
+    pools = make_pools(5, 2, 1.0, 0)
+    graph = ArbitrageGraph(pools)
+    bases = [ALGO] + [asset for asset in graph.graph if asset != ALGO][:2]
+    return graph.compile_bases(bases, 3)
+
+
+def test_rotations_share_a_key(index):
+    sequences = {}
+    for i in range(len(index)):
+        assets = [edge.asset_in for edge in index.path(i).edges]
+        assert assets[0] == index.assets[index.bases[i]]
+        sequences.setdefault(index.cycle_keys[i], []).append(assets)
+    for rotations in sequences.values():
+        first = rotations[0]
+        assert len(rotations) == len(set(first) & set(index.assets))
+        assert all(any(rotation == first[k:] + first[:k] for k in range(len(first))) for rotation in rotations)
+
+
+def test_best_rotations_keep_one_row_per_cycle(index):
+    cycle_ids = np.arange(len(index))
+    profits = np.random.default_rng(0).random(len(index))
+    best = index.best_rotations(cycle_ids, profits)
+    keys = index.cycle_keys[best]
+    assert len(keys) == len(np.unique(index.cycle_keys))
+    for key, profit in zip(keys, profits[best]):
+        assert profit == profits[index.cycle_keys == key].max()
+
+
+def test_cycles_rooted_at_include_every_rotation(index):
+    cycle_ids = index.cycles_rooted_at(np.array([1]))
+    keys = np.unique(index.cycle_keys[index.bases == 1])
+    assert set(cycle_ids.tolist()) == set(np.flatnonzero(np.isin(index.cycle_keys, keys)).tolist())
+    assert np.isin(np.flatnonzero(index.bases == 1), cycle_ids).all()
@@ -0,0 +1,35 @@
+"""Budgets of `SubmissionPlanner.plan`."""
+from types import SimpleNamespace
+
+from bot.asset import Asset, ALGO
+from bot.planner import SubmissionPlanner
+
+USDC = Asset(31566704, 6, 'USDC', 'USDC')
+FEE = 3000
+
+
+def opportunity(asset: Asset, profit_rate: float = 0.01):
+    """A path on a pool of its own, profitable at any amount, sized to its maximum."""
+    path = SimpleNamespace(
+        asset=asset,
+        edges=[SimpleNamespace(pool=object())],
+        optimal_amount_in_analytic=lambda max_amount_in: max_amount_in,
+        profit=lambda amount_in: int(amount_in * profit_rate),
+    )
+    return path, FEE
+
+
+def test_algo_fees_come_out_of_the_algo_budget():
+    planner = SubmissionPlanner(10**12)
+    plans = planner.plan([opportunity(USDC), opportunity(ALGO), opportunity(ALGO)], {ALGO: 1_000_000, USDC: 10**6})
+    # The ALGO swap spends what the fees of both groups leave, so the last one has nothing left.
+    assert [plan.path.asset for plan in plans] == [USDC, ALGO]
+    assert plans[1].amount_in + 2 * FEE == 1_000_000
+
+
+def test_plans_without_algo_for_their_fee_are_skipped():
+    planner = SubmissionPlanner(10**12)
+    plans = planner.plan([opportunity(USDC)], {ALGO: FEE - 1, USDC: 10**6})
+    assert plans == []
+    plans = planner.plan([opportunity(USDC)], {USDC: 10**6})
+    assert len(plans) == 1
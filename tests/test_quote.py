@@ -0,0 +1,108 @@
+"""The native quotes of `bot.quote` against the DEX SDKs and vectors of their contracts, bit for bit."""
+import random
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from bot.quote import (
+    algofi_amount_out, algofi_amount_out_array,
+    pactfi_amount_out, pactfi_amount_out_array,
+    tinyman_amount_out, tinyman_amount_out_array,
+)
+
+SEED = 0
+CASES = 500
+
+# `(reserve_in, reserve_out, fee_bps, amounts_in, amounts_out)` computed once,
+# so they are checked without the SDKs, which don't install everywhere. They
+# come from transcriptions of the contracts' integer math: Tinyman V2
+# `calculate_fixed_input_swap`, where swaps too small to receive anything
+# (`LowSwapAmountError`) quote 0, and Algofi's constant product `swap_exact_for`.
+TINYMAN_VECTORS = [
+    (1, 1, 1, [0, 1, 2, 3, 100], [0, 0, 0, 0, 0]),
+    (1000, 7, 0, [0, 1, 2, 3, 100, 1000, 1015, 1559, 2000], [0, 0, 0, 0, 0, 3, 3, 4, 4]),
+    (7, 1000, 30, [0, 1, 2, 3, 7, 8, 11, 14, 100], [0, 124, 222, 299, 499, 533, 611, 666, 934]),
+    (1000000, 1000000, 30, [0, 1, 2, 3, 100, 1000, 440308, 1000000, 1654073, 2000000], [0, 0, 1, 2, 99, 996, 305067, 499248, 622514, 665998]),
+    (123456789, 987654321, 0, [0, 1, 2, 3, 100, 123456, 7609467, 123456789, 130958025, 246913578], [0, 8, 15, 23, 799, 986661, 57341402, 493827160, 508387295, 658436213]),
+    (1000000000000000, 300000000000000, 30, [0, 1, 2, 3, 100, 1000000000000, 1000000000000000, 1367828683412103, 1727486365059462, 2000000000000000], [0, 0, 0, 0, 29, 298802094311, 149774661992989, 173081693111015, 189799225081839, 199799599198396]),
+    (5000000000000, 1000000000000000, 0, [0, 1, 2, 3, 100, 5000000000, 4027828174390, 5000000000000, 7837008927321, 10000000000000], [0, 199, 399, 599, 19999, 999000999000, 446156937924015, 499999999999999, 610501166719725, 666666666666666]),
+]
+ALGOFI_VECTORS = [
+    (1, 1, 25, [0, 1, 2, 3, 100], [0, 0, 0, 0, 0]),
+    (1000, 7, 25, [0, 1, 2, 3, 53, 100, 1000, 1331, 2000], [0, 0, 0, 0, 0, 0, 3, 3, 4]),
+    (7, 1000, 25, [0, 1, 2, 3, 7, 11, 14, 100], [0, 0, 125, 222, 461, 588, 650, 933]),
+    (1000000, 1000000, 25, [0, 1, 2, 3, 100, 1000, 885243, 1000000, 1522224, 2000000], [0, 0, 0, 1, 98, 996, 468940, 499374, 602925, 666110]),
+    (123456789, 987654321, 25, [0, 1, 2, 3, 100, 123456, 59509904, 123456789, 141634444, 246913578], [0, 0, 8, 15, 791, 984194, 320692173, 493209103, 527074334, 657886601]),
+    (1000000000000000, 300000000000000, 75, [0, 1, 2, 3, 100, 1000000000000, 524860262986891, 1000000000000000, 1116472192352240, 2000000000000000], [0, 0, 0, 0, 29, 297454776134, 102751460771796, 149435382685069, 157691669281911, 199497487437185]),
+    (5000000000000, 1000000000000000, 75, [0, 1, 2, 3, 100, 5000000000, 1759400257364, 5000000000000, 7318716569974, 10000000000000], [0, 0, 199, 399, 19799, 991515920448, 258842537209785, 498117942283563, 592296896562874, 664991624790619]),
+]
+
+
+def random_cases(seed: int = SEED, n: int = CASES):
+    """Reserves from dust to 10^15, fees of real pools and amounts up to twice the reserve in."""
+    rng = random.Random(seed)
+    for _ in range(n):
+        reserve_in = rng.choice([rng.randint(1, 1000), rng.randint(1000, 10**9), rng.randint(10**9, 10**15)])
+        reserve_out = rng.choice([rng.randint(1, 1000), rng.randint(1000, 10**9), rng.randint(10**9, 10**15)])
+        fee_bps = rng.choice([0, 1, 5, 25, 30, 100, 200])
+        amounts_in = [0, 1, 2, 10] + [rng.randint(1, 2 * reserve_in) for _ in range(12)]
+        yield reserve_in, reserve_out, fee_bps, amounts_in
+
+
+def test_pactfi_constant_product_matches_sdk():
+    from pactsdk.pool_calculator import PoolCalculator
+
+    primary, secondary = SimpleNamespace(index=1), SimpleNamespace(index=2)
+    for reserve_in, reserve_out, fee_bps, amounts_in in random_cases():
+        pool = SimpleNamespace(
+            pool_type='CONSTANT_PRODUCT',
+            fee_bps=fee_bps,
+            primary_asset=primary,
+            internal_state=SimpleNamespace(A=reserve_in, B=reserve_out),
+        )
+        calculator = PoolCalculator(pool)
+        expected = [calculator.amount_deposited_to_net_amount_received(primary, amount_in) for amount_in in amounts_in]
+        assert [pactfi_amount_out(reserve_in, reserve_out, amount_in, fee_bps) for amount_in in amounts_in] == expected
+        assert pactfi_amount_out_array(reserve_in, reserve_out, np.array(amounts_in), fee_bps).tolist() == expected
+
+
+def test_tinyman_matches_sdk():
+    formulas = pytest.importorskip('tinyman.v2.formulas')
+
+    for reserve_in, reserve_out, fee_bps, amounts_in in random_cases():
+        expected = []
+        for amount_in in amounts_in:
+            try:
+                expected.append(formulas.calculate_fixed_input_swap(reserve_in, reserve_out, amount_in, fee_bps)[0])
+            except Exception as e:
+                # The SDK refuses swaps too small to receive anything, which quote 0.
+                if type(e).__name__ != 'LowSwapAmountError':
+                    raise
+                expected.append(0)
+        assert [tinyman_amount_out(reserve_in, reserve_out, amount_in, fee_bps) for amount_in in amounts_in] == expected
+        assert tinyman_amount_out_array(reserve_in, reserve_out, np.array(amounts_in), fee_bps).tolist() == expected
+
+
+@pytest.mark.parametrize('reserve_in, reserve_out, fee_bps, amounts_in, expected', TINYMAN_VECTORS)
+def test_tinyman_matches_vectors(reserve_in, reserve_out, fee_bps, amounts_in, expected):
+    assert [tinyman_amount_out(reserve_in, reserve_out, amount_in, fee_bps) for amount_in in amounts_in] == expected
+    assert tinyman_amount_out_array(reserve_in, reserve_out, np.array(amounts_in), fee_bps).tolist() == expected
+
+
+@pytest.mark.parametrize('reserve_in, reserve_out, fee_bps, amounts_in, expected', ALGOFI_VECTORS)
+def test_algofi_matches_vectors(reserve_in, reserve_out, fee_bps, amounts_in, expected):
+    assert [algofi_amount_out(reserve_in, reserve_out, amount_in, fee_bps) for amount_in in amounts_in] == expected
+    assert algofi_amount_out_array(reserve_in, reserve_out, np.array(amounts_in), fee_bps).tolist() == expected
+
+
+def test_array_quotes_fall_back_to_python_integers():
+    # Products past int64 must not wrap around.
+    reserve_in, reserve_out = 10**15, 10**15
+    amounts_in = [10**14, 10**15, 2 * 10**15]
+    assert tinyman_amount_out_array(reserve_in, reserve_out, amounts_in, 30).tolist() == [
+        tinyman_amount_out(reserve_in, reserve_out, amount_in, 30) for amount_in in amounts_in
+    ]
+    assert pactfi_amount_out_array(reserve_in, reserve_out, amounts_in, 30).tolist() == [
+        pactfi_amount_out(reserve_in, reserve_out, amount_in, 30) for amount_in in amounts_in
+    ]
@@ -0,0 +1,67 @@
+"""`LocalSimulator` on groups signed by `GroupBuilder` over in-memory pools."""
+import asyncio
+
+import pytest
+from algosdk import account, mnemonic, transaction
+
+from benchmark import make_pools
+from bot.account import Account
+from bot.arbitrage import ArbitrageGraph
+from bot.asset import ALGO
+from bot.simulation import LocalSimulator
+from bot.templates import GroupBuilder, canonical, pack
+
+AMOUNT_IN = 100_000
+
+
+@pytest.fixture
+def setup():
+    pools = make_pools(6, 2, 0.6, 0)
+    paths = ArbitrageGraph(pools).compile(ALGO, 3).paths[:20]
+    sender = Account(None, mnemonic.from_private_key(account.generate_account()[0]))
+    params = transaction.SuggestedParams(0, 5, 1005, 'wGHE2Pwdvd7S12BL5FaOP20EGYesN73ktiC1qzkkit8=', 'mainnet-v1.0', min_fee=1000)
+    builder = GroupBuilder(sender)
+    builder.update(params)
+    return pools, paths, builder, params
+
+
+def simulate(simulator, groups):
+    return asyncio.run(simulator.simulate(groups, [ALGO] * len(groups)))
+
+
+def test_profit_matches_the_quotes(setup):
+    pools, paths, builder, params = setup
+    results = simulate(LocalSimulator(pools), [builder.sign(path, AMOUNT_IN) for path in paths])
+    for path, result in zip(paths, results):
+        assert result.failure is None
+        assert result.profit_after_fee() == path.profit(AMOUNT_IN) - sum(edge.pool.fee(params) for edge in path.edges)
+
+
+def test_swap_below_minimum_amount_out_fails(setup):
+    pools, paths, builder, _ = setup
+    group = builder.sign(paths[0], AMOUNT_IN)
+    edge = paths[0].edges[0]
+    pool = edge.pool
+    pool.restore_state([pool._supply[asset] // (1 if asset == edge.asset_in else 2) for asset in pool.assets], pool.fee_bps)
+    [result] = simulate(LocalSimulator(pools), [group])
+    assert result.profit is None
+    assert result.failure.startswith(f'Swap on {pool.address}')
+
+
+def test_transfer_to_unknown_address_fails(setup):
+    pools, paths, builder, _ = setup
+    path = paths[0]
+    known = [pool for pool in pools if pool is not path.edges[0].pool]
+    [result] = simulate(LocalSimulator(known), [builder.sign(path, AMOUNT_IN)])
+    assert result.profit is None
+    assert 'not a known pool' in result.failure
+
+
+def test_transfer_without_application_call_fails(setup):
+    pools, _, builder, params = setup
+    pool = next(pool for pool in pools if ALGO in pool.assets)
+    txn = transaction.PaymentTxn(builder.account.address, params, pool.address, AMOUNT_IN)
+    group = pack({'txn': canonical(txn.dictify())})
+    [result] = simulate(LocalSimulator(pools), [group])
+    assert result.profit is None
+    assert result.failure == f'Transfer 0 to {pool.address} is not a swap of the pool.'
@@ -0,0 +1,31 @@
+"""Groups assembled by `GroupBuilder`."""
+import pytest
+from algosdk import account, mnemonic, transaction
+
+from benchmark import FakePool, make_pools
+from bot.account import Account
+from bot.arbitrage import ArbitrageGraph
+from bot.asset import ALGO
+from bot.exceptions import PoolTransactionError
+from bot.templates import GroupBuilder
+
+AMOUNT_IN = 100_000
+
+
+class ForeignSenderPool(FakePool):
+    """Swaps through a transfer sent by another account, and has no template."""
+
+    swap_min_out_arg = None
+
+    def prepare_internal_swap_txns(self, sender, asset_in, amount_in, amount_out, suggested_params):
+        return super().prepare_internal_swap_txns(self.address, asset_in, amount_in, amount_out, suggested_params)
+
+
+def test_groups_with_transactions_of_other_senders_are_refused():
+    pools = make_pools(4, 1, 1.0, 0)
+    pools[0].__class__ = ForeignSenderPool
+    path = next(path for path in ArbitrageGraph(pools).compile(ALGO, 3).paths if any(edge.pool is pools[0] for edge in path.edges))
+    builder = GroupBuilder(Account(None, mnemonic.from_private_key(account.generate_account()[0])))
+    builder.update(transaction.SuggestedParams(0, 5, 1005, 'wGHE2Pwdvd7S12BL5FaOP20EGYesN73ktiC1qzkkit8=', 'mainnet-v1.0', min_fee=1000))
+    with pytest.raises(PoolTransactionError):
+        builder.sign(path, AMOUNT_IN)